@@ -1 +1,8 @@
-from .core import PPSCore
\ No newline at end of file
+__all__ = ['PPSCore']
+
+def __getattr__(name):
+    # PPSCore and its dependencies are imported on first use, so importing constants stays cheap
+    if name == 'PPSCore':
+        from .core import PPSCore
+        return PPSCore
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,142 @@
+import io
+import os
+import time
+import typing
+import contextlib
+import traceback
+
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .constant import POLYGON_CONFIG_FILE_NAME, PPS_OUTPUT_FORMAT_DIRECTORY
+from .source import is_zip_package
+
+def discover_polygon_packages(
+    root_path : typing.Union[str, Path],
+):
+    '''
+    find every polygon package (directory with problem.xml or its zip archive) under root
+
+    zip archives inside a package directory belong to that package and are skipped
+    '''
+    root_path = Path(root_path).resolve()
+    packages = []
+    for config_path in root_path.rglob(POLYGON_CONFIG_FILE_NAME):
+        if config_path.is_file():
+            packages.append(config_path.parent)
+    directories = set(packages)
+    for archive_path in root_path.rglob('*.zip'):
+        if any(parent in directories for parent in archive_path.parents):
+            continue
+        if is_zip_package(archive_path):
+            packages.append(archive_path)
+    return sorted(packages)
+
+def convert_package(
+    source_path : typing.Union[str, Path],
+    destination_path : typing.Union[str, Path],
+    options : typing.Optional[dict] = None,
+):
+    '''
+    convert one polygon package, never raises
+
+    runs inside a worker process, so the pipeline output is captured
+    and returned with the result instead of being interleaved on stdout,
+    options are passed to PPSCore as keyword arguments
+    '''
+    from .core import PPSCore
+
+    result = {
+        'source': str(source_path),
+        'destination': str(destination_path),
+        'ok': True,
+        'error': '',
+        'traceback': '',
+        'elapsed': 0.0,
+        'log': '',
+    }
+    log = io.StringIO()
+    started = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(log):
+            PPSCore(
+                source_path = source_path,
+                destination_path = destination_path,
+                **(options or {}),
+            ).run()
+    except Exception as e:
+        result['ok'] = False
+        result['error'] = f'{type(e).__name__}: {e}'
+        result['traceback'] = traceback.format_exc()
+    result['elapsed'] = time.perf_counter() - started
+    result['log'] = log.getvalue()
+    return result
+
+def run_batch(
+    root_path : typing.Union[str, Path],
+    destination_root : typing.Union[str, Path],
+    workers : typing.Optional[int] = None,
+    options : typing.Optional[dict] = None,
+):
+    '''
+    convert every polygon package under root in parallel
+
+    each package is written to the same relative path under destination root,
+    without .zip suffix of zipped packages and with archive suffix if output format is an archive,
+    a failing package is reported and does not stop the others
+    '''
+    root_path = Path(root_path).resolve()
+    destination_root = Path(destination_root).resolve()
+    packages = discover_polygon_packages(root_path)
+    output_format = (options or {}).get('output_format') or PPS_OUTPUT_FORMAT_DIRECTORY
+    suffix = '' if output_format == PPS_OUTPUT_FORMAT_DIRECTORY else '.' + output_format
+    destinations = {}
+    for package in packages:
+        relative = package.relative_to(root_path)
+        if package.is_file():
+            relative = relative.with_suffix('')
+        destinations[package] = Path(str(destination_root / relative) + suffix)
+    if workers is None or workers < 1:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(packages)))
+
+    print(f'Found {len(packages)} polygon packages in {root_path}')
+    print(f'Converting with {workers} workers...\n')
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                convert_package,
+                package,
+                destinations[package],
+                options,
+            ): package for package in packages
+        }
+        for future in as_completed(futures):
+            package = futures[future]
+            try:
+                result = future.result()
+            except Exception as e: # worker process died
+                result = {
+                    'source': str(package),
+                    'destination': str(destinations[package]),
+                    'ok': False,
+                    'error': f'{type(e).__name__}: {e}',
+                    'traceback': '',
+                    'elapsed': 0.0,
+                    'log': '',
+                }
+            results.append(result)
+            if result['ok']:
+                print(f'[OK] {result["source"]} ({result["elapsed"]:.2f}s)')
+            else:
+                print(f'[FAIL] {result["source"]}: {result["error"]}')
+
+    failed = [result for result in results if not result['ok']]
+    print()
+    print(f'[BATCH] converted: {len(results) - len(failed)} / {len(results)}')
+    for result in failed:
+        print(f'[BATCH] failed: {result["source"]}')
+        print(result['traceback'])
+    return results
@@ -0,0 +1,163 @@
+import os
+import sys
+import time
+import typing
+import hashlib
+import threading
+
+from pathlib import Path
+
+from .constant import (
+    PPS_STATEMENT_CONVERTER_VERSION,
+    PPS_STATEMENT_CACHE_NAME,
+    PPS_STATEMENT_CACHE_SIZE,
+)
+
+def get_default_cache_path():
+    '''
+    get user cache directory of polygon2pps, shared by every package and process
+    '''
+    if sys.platform == 'win32' and 'LOCALAPPDATA' in os.environ:
+        base_path = Path(os.environ['LOCALAPPDATA'])
+    elif os.environ.get('XDG_CACHE_HOME'):
+        base_path = Path(os.environ['XDG_CACHE_HOME'])
+    else:
+        base_path = Path.home() / '.cache'
+    return base_path / PPS_STATEMENT_CACHE_NAME
+
+def get_converter_version():
+    '''
+    get version of statement conversion, cached statements of other versions are not used
+    '''
+    import importlib.metadata # slow to import, only needed when a statement is converted
+    try:
+        latex2markdown_version = importlib.metadata.version('latex2markdown')
+    except importlib.metadata.PackageNotFoundError:
+        latex2markdown_version = 'unknown'
+    return f'{PPS_STATEMENT_CONVERTER_VERSION} latex2markdown-{latex2markdown_version}'
+
+def get_statement_extra():
+    '''
+    get manifest extra of converted statement, statements are converted again when the converter changes
+    '''
+    return f'statement {get_converter_version()}'
+
+class StatementCache:
+    '''
+    on disk cache of converted statements, keyed by hash of tex and converter version
+
+    entries are written atomically so that batch workers can share the cache,
+    least recently used entries are removed when the cache grows over max size,
+    the cache is best effort and never fails a conversion
+    '''
+    def __init__(
+        self,
+        cache_path : typing.Optional[typing.Union[str, Path]] = None,
+        max_size : int = PPS_STATEMENT_CACHE_SIZE,
+        version : typing.Optional[str] = None,
+    ):
+        self.cache_path = Path(cache_path if cache_path is not None else get_default_cache_path()) / 'statements'
+        self.max_size = max_size
+        self.version = version # looked up on first use
+        self.hits = 0
+        self.misses = 0
+
+    def get_entry_path(
+        self,
+        tex_string : str,
+    ):
+        '''
+        get path of cache entry of statement
+        '''
+        if self.version is None:
+            self.version = get_converter_version()
+        digest = hashlib.sha256(self.version.encode('utf-8') + b'\0' + tex_string.encode('utf-8')).hexdigest()
+        return self.cache_path / digest[:2] / f'{digest}.md'
+
+    def get(
+        self,
+        tex_string : str,
+    ):
+        '''
+        get converted statement, None if it is not cached
+        '''
+        path = self.get_entry_path(tex_string)
+        try:
+            markdown = path.read_bytes().decode('utf-8')
+            os.utime(path) # mark as recently used
+        except (OSError, UnicodeDecodeError):
+            return None
+        return markdown
+
+    def put(
+        self,
+        tex_string : str,
+        markdown : str,
+    ):
+        '''
+        store converted statement
+        '''
+        path = self.get_entry_path(tex_string)
+        temporary_path = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temporary_path.write_bytes(markdown.encode('utf-8'))
+            os.replace(temporary_path, path)
+        except OSError:
+            try:
+                os.remove(temporary_path)
+            except OSError:
+                pass
+
+    def convert(
+        self,
+        tex_string : str,
+        converter : typing.Callable[[str], str],
+    ):
+        '''
+        get converted statement from cache, converting and storing it if not cached
+        '''
+        markdown = self.get(tex_string)
+        if markdown is not None:
+            self.hits += 1
+            return markdown
+        self.misses += 1
+        markdown = converter(tex_string)
+        self.put(tex_string, markdown)
+        return markdown
+
+    def trim(self):
+        '''
+        remove least recently used entries until cache fits in max size
+
+        temporary files left by interrupted writes are removed after an hour
+        '''
+        entries = []
+        total_size = 0
+        now = time.time()
+        try:
+            directories = list(os.scandir(self.cache_path))
+        except OSError:
+            return
+        for directory in directories:
+            try:
+                with os.scandir(directory.path) as files:
+                    for entry in files:
+                        stat = entry.stat()
+                        if entry.name.endswith('.tmp'):
+                            if now - stat.st_mtime > 3600:
+                                os.remove(entry.path)
+                            continue
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+                        total_size += stat.st_size
+            except OSError: # removed by another process meanwhile
+                continue
+        entries.sort()
+        for _, size, path in entries:
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total_size -= size
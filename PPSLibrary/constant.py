@@ -68,4 +68,77 @@ PPS_FS_SOLUTION_PATH = 'solution'
 PPS_FS_VALIDATOR_PATH = 'validator'
 PPS_FS_INTERACTOR_PATH = 'interactor'
 
-PPS_FS_CONFIG_NAME = 'config.json'
\ No newline at end of file
+PPS_FS_CONFIG_NAME = 'config.json'
+PPS_FS_MANIFEST_NAME = '.pps_manifest.json'
+
+# genscript entries encoded at once while writing config file
+PPS_CONFIG_JSON_BATCH_SIZE = 1024
+PPS_CONFIG_JSON_INDENT = 4
+PPS_CONFIG_JSON_COMPACT_SEPARATORS = (',', ':')
+
+PPS_MANIFEST_VERSION = 4
+
+PPS_COPY_WORKERS = 8
+
+PPS_OUTPUT_FORMAT_DIRECTORY = 'directory'
+PPS_OUTPUT_FORMAT_ZIP = 'zip'
+PPS_OUTPUT_FORMAT_TAR = 'tar'
+PPS_OUTPUT_FORMAT_TAR_GZ = 'tar.gz'
+PPS_OUTPUT_FORMATS = [
+    PPS_OUTPUT_FORMAT_DIRECTORY,
+    PPS_OUTPUT_FORMAT_ZIP,
+    PPS_OUTPUT_FORMAT_TAR,
+    PPS_OUTPUT_FORMAT_TAR_GZ,
+]
+PPS_OUTPUT_SPOOL_SIZE = 8 * 1024 * 1024
+
+PPS_WATCH_INTERVAL = 0.5
+
+PPS_SERVER_HOST = '127.0.0.1'
+PPS_SERVER_PORT = 8765
+PPS_SERVER_QUEUE_SIZE = 16
+PPS_SERVER_CHUNK_SIZE = 1024 * 1024
+
+# bump when polygon_tex_to_pps_markdown gives different markdown for the same tex
+PPS_STATEMENT_CONVERTER_VERSION = 1
+PPS_STATEMENT_CACHE_NAME = 'polygon2pps'
+PPS_STATEMENT_CACHE_SIZE = 64 * 1024 * 1024
+
+PPS_COPY_STRATEGY_AUTO = 'auto'
+PPS_COPY_STRATEGY_HARDLINK = 'hardlink'
+PPS_COPY_STRATEGY_COPY = 'copy'
+PPS_COPY_STRATEGIES = [
+    PPS_COPY_STRATEGY_AUTO,
+    PPS_COPY_STRATEGY_HARDLINK,
+    PPS_COPY_STRATEGY_COPY,
+]
+
+PPS_MANUAL_GENERATOR_SIZE_LIMIT = 49 * 1024 * 1024
+PPS_MANUAL_GENERATOR_CHUNK_SIZE = 1024 * 1024
+# seconds one manual data generator may run while verifying a package
+PPS_MANUAL_GENERATOR_VERIFY_TIMEOUT = 60
+
+PPS_MANUAL_GENERATOR_ENCODING_REPR = 'repr'
+PPS_MANUAL_GENERATOR_ENCODING_ZLIB = 'zlib'
+PPS_MANUAL_GENERATOR_ENCODING_LZMA = 'lzma'
+PPS_MANUAL_GENERATOR_ENCODINGS = [
+    PPS_MANUAL_GENERATOR_ENCODING_REPR,
+    PPS_MANUAL_GENERATOR_ENCODING_ZLIB,
+    PPS_MANUAL_GENERATOR_ENCODING_LZMA,
+]
+
+PPS_MANUAL_GENERATOR_LAYOUT_CHAIN = 'chain'
+PPS_MANUAL_GENERATOR_LAYOUT_TABLE = 'table'
+PPS_MANUAL_GENERATOR_LAYOUTS = [
+    PPS_MANUAL_GENERATOR_LAYOUT_CHAIN,
+    PPS_MANUAL_GENERATOR_LAYOUT_TABLE,
+]
+
+PPS_MANUAL_GENERATOR_PACKING_ORDER = 'order'
+PPS_MANUAL_GENERATOR_PACKING_COMPACT = 'compact'
+PPS_MANUAL_GENERATOR_PACKING_BALANCED = 'balanced'
+PPS_MANUAL_GENERATOR_PACKINGS = [
+    PPS_MANUAL_GENERATOR_PACKING_ORDER,
+    PPS_MANUAL_GENERATOR_PACKING_COMPACT,
+    PPS_MANUAL_GENERATOR_PACKING_BALANCED,
+]
@@ -1,64 +1,219 @@
-import json
+import typing
+import contextlib
 from pathlib import Path
 
-from .constant import *
+from .constant import (
+    POLYGON_CONFIG_FILE_NAME,
+    PPS_COPY_STRATEGY_AUTO,
+    PPS_COPY_WORKERS,
+    PPS_FS_CHECKER_PATH,
+    PPS_FS_CONFIG_NAME,
+    PPS_FS_GENERATOR_PATH,
+    PPS_FS_INTERACTOR_PATH,
+    PPS_FS_SOLUTION_PATH,
+    PPS_FS_STATEMENT_PATH,
+    PPS_FS_VALIDATOR_PATH,
+    PPS_MANUAL_GENERATOR_CHUNK_SIZE,
+    PPS_MANUAL_GENERATOR_ENCODING_REPR,
+    PPS_MANUAL_GENERATOR_LAYOUT_CHAIN,
+    PPS_MANUAL_GENERATOR_LAYOUT_TABLE,
+    PPS_MANUAL_GENERATOR_PACKING_ORDER,
+)
+from .error import PPSVerifyError
 from .filesystem import FileSystem
-from .misc import make_manual_generator, polygon_tex_to_pps_markdown
+from .manifest import Manifest
+from .cache import StatementCache, get_statement_extra
+from .sink import OutputSink, make_sink
+from .source import make_source
+from .misc import (
+    group_manual_tests,
+    get_manual_test_payload_key,
+    split_manual_generator,
+    get_manual_generator_layout,
+    encode_manual_test,
+    stream_encoded_manual_generator,
+    ManualTestSpool,
+    polygon_tex_to_pps_markdown,
+)
 from .polygon_config import PolygonConfig
+from .model import iter_pps_json_config
+from .trace import span, start_tracing, stop_tracing
 
 class PPSCore:
     def __init__(
         self,
         source_path : str,
         destination_path : str,
+        incremental : bool = True,
+        generator_encoding : str = PPS_MANUAL_GENERATOR_ENCODING_REPR,
+        generator_layout : str = PPS_MANUAL_GENERATOR_LAYOUT_CHAIN,
+        generator_packing : str = PPS_MANUAL_GENERATOR_PACKING_ORDER,
+        copy_workers : int = PPS_COPY_WORKERS,
+        copy_strategy : str = PPS_COPY_STRATEGY_AUTO,
+        output_format : typing.Optional[str] = None,
+        sink : typing.Optional[OutputSink] = None,
+        trace_path : typing.Optional[str] = None,
+        profile_path : typing.Optional[str] = None,
+        use_cache : bool = True,
+        cache_path : typing.Optional[str] = None,
+        compact_config : bool = False,
+        verify : bool = False,
+        verify_workers : typing.Optional[int] = None,
     ):
         '''
         pps core initialize function
+
+        polygon package is read from directory or zip archive,
+        package is written to destination in output format guessed from its suffix,
+        or to the given sink, outputs of previous run are reused only for directories,
+        spans of a run are written to trace path and cprofile stats of stages to profile path if given,
+        converted statements are cached in cache path (default: user cache directory) unless use_cache is off,
+        config file is written without indentation if compact config is set,
+        manual tests are packed into generator shards in test order or by size with generator packing,
+        generators are run for every manual test and compared with it after the package is made if verify is set
         '''
         self.source_path = Path(source_path)
         self.destination_path = Path(destination_path)
-        self.fs = FileSystem()
+        self.generator_encoding = generator_encoding
+        self.generator_layout = generator_layout
+        self.generator_packing = generator_packing
+        self.shard_layout = [] # tests, payloads and size of every generator shard of last run
+        self.generator_shards = [] # groups of manual test indexes in every generator shard of last run
+        self.generator_manuals = [] # paths of manual tests of last run
+        self.verify = verify
+        self.verify_workers = verify_workers
+        self.verify_report = [] # execution time and mismatches of every generator shard of last run
+        self.copy_workers = copy_workers
+        self.fs = FileSystem(copy_strategy)
+        self.source = make_source(self.fs, self.source_path)
+        self.sink = sink if sink is not None else make_sink(self.fs, self.destination_path, output_format)
+        self.incremental = incremental and self.sink.incremental
+        self.manifest = Manifest(self.fs, self.destination_path, self.source)
         self.polygon_config = PolygonConfig()
+        self.pps_config = {}
+        self.compact_config = compact_config
+        self.trace_path = Path(trace_path) if trace_path is not None else None
+        self.profile_path = Path(profile_path) if profile_path is not None else None
+        self.statement_cache = StatementCache(cache_path) if use_cache else None
+        self.statement_extra = None # looked up on first statement
 
     def run(self):
         '''
         pipeline for makeing pps package from polygon package
         '''
-        self.prepare() # preparing for making pps package
-        use_interactor = self.generate_pps_config() # making config file
-        self.copy_files(use_interactor) # copying files
-        self.make_pps_custom_generator() # making pps custom generator if needed
+        if self.trace_path is not None:
+            start_tracing()
+        try:
+            with self.stage('prepare'):
+                self.prepare() # preparing for making pps package
+            self.build() # making config, files and generators
+        finally:
+            self.sink.close()
+            self.source.close()
+            if self.trace_path is not None:
+                stop_tracing().save(self.trace_path)
+                print(f'Trace written to {self.trace_path}')
+
+    def build(self):
+        '''
+        make pps package from parsed polygon config, skipping outputs which are up to date
+        '''
+        with self.stage('generate_pps_config'):
+            use_interactor = self.generate_pps_config() # making config file
+        with self.stage('copy_files'):
+            self.copy_files(use_interactor) # copying files
+        with self.stage('make_pps_custom_generator'):
+            self.make_pps_custom_generator() # making pps custom generator if needed
+        with self.stage('finalize'):
+            self.finalize() # removing stale files & saving manifest
+        if self.verify:
+            with self.stage('verify'):
+                self.verify_generators() # running generators against manual tests
+
+    @contextlib.contextmanager
+    def stage(self, name : str):
+        '''
+        run pipeline stage as traced span, profiled into <profile path>/<name>.prof if needed
+
+        cprofile sees only the calling thread, so copy jobs on worker threads are not profiled
+        '''
+        if self.profile_path is None:
+            with span(name, 'stage'):
+                yield
+            return
+        import cProfile
+        profile = cProfile.Profile()
+        with span(name, 'stage'):
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+                self.profile_path.mkdir(parents=True, exist_ok=True)
+                profile.dump_stats(self.profile_path / f'{name}.prof')
+
+    def update(
+        self,
+        changed_paths : typing.List[Path],
+        reparse : bool = False,
+    ):
+        '''
+        make pps package again after source files changed
+
+        parsed polygon config is kept unless it has to be parsed again,
+        only outputs built from changed files are made again
+        '''
+        if reparse:
+            # archive is opened again since it may have been replaced,
+            # nothing is replaced until the new config is parsed
+            source = make_source(self.fs, self.source_path)
+            polygon_config = PolygonConfig()
+            try:
+                with source.open_file(self.source_path / POLYGON_CONFIG_FILE_NAME) as f:
+                    polygon_config.parse_config_file(f)
+            except Exception:
+                source.close()
+                raise
+            self.source.close()
+            self.source = self.manifest.source = source
+            self.polygon_config = polygon_config
+        self.manifest.checkpoint(None if reparse else changed_paths)
+        self.build()
 
     def prepare(self):
         '''
         preparing for making pps package
         '''
         print('Generate pps package directories\n')
-        # make destination directory
-        self.fs.create_directory(self.destination_path)
+        # make pps package subdirectories, destination directory is made with them
+        self.sink.create_directory(PPS_FS_STATEMENT_PATH)
+        self.sink.create_directory(PPS_FS_CHECKER_PATH)
+        self.sink.create_directory(PPS_FS_GENERATOR_PATH)
+        self.sink.create_directory(PPS_FS_SOLUTION_PATH)
+        self.sink.create_directory(PPS_FS_VALIDATOR_PATH)
+        self.sink.create_directory(PPS_FS_INTERACTOR_PATH)
 
-        # make pps package subdirectories
-        self.fs.create_directory(self.destination_path / PPS_FS_STATEMENT_PATH)
-        self.fs.create_directory(self.destination_path / PPS_FS_CHECKER_PATH)
-        self.fs.create_directory(self.destination_path / PPS_FS_GENERATOR_PATH)
-        self.fs.create_directory(self.destination_path / PPS_FS_SOLUTION_PATH)
-        self.fs.create_directory(self.destination_path / PPS_FS_VALIDATOR_PATH)
-        self.fs.create_directory(self.destination_path / PPS_FS_INTERACTOR_PATH)
+        # load manifest of previous run
+        if self.incremental:
+            self.manifest.load()
 
         # parse polygon package config file
-        self.polygon_config.parse_config_file(self.source_path / POLYGON_CONFIG_FILE_NAME)
+        self.parse_config()
+
+    def parse_config(self):
+        '''
+        parse polygon package config file
+        '''
+        with self.source.open_file(self.source_path / POLYGON_CONFIG_FILE_NAME) as f:
+            self.polygon_config.parse_config_file(f)
     
     def generate_pps_config(self):
         '''
         generate pps package config file
         '''
         print('Generate pps package config file...\n')
-        # generate pps package config file
-        config, use_interactor = self.polygon_config.generate_pps_json_config()
-        if self.fs.is_exists(self.destination_path / PPS_FS_CONFIG_NAME):
-            self.fs.delete_file(self.destination_path / PPS_FS_CONFIG_NAME)
-        self.fs.create_file(self.destination_path / PPS_FS_CONFIG_NAME)
-        self.fs.set_file_data(self.destination_path / PPS_FS_CONFIG_NAME, config)
+        # generate pps package config, written once in finalize
+        self.pps_config, use_interactor = self.polygon_config.generate_pps_config()
 
         return use_interactor
 
@@ -67,96 +222,149 @@ class PPSCore:
         copy files from polygon package to pps package
         '''
         print('Copy files from polygon package to pps package...\n')
+        copies = {} # destination -> (source, job), a later file with the same name wins
+
+        # statements are converted, checker, interactor, generators, solutions and validators are copied
+        for kind, path, dest in self.polygon_config.get_pps_files(use_interactor):
+            src = self.source_path / path
+            if dest.startswith(PPS_FS_INTERACTOR_PATH + '/'):
+                print(f'Copy interactor file from {src} to {dest}')
+            if kind == 'statement' and self.statement_extra is None:
+                self.statement_extra = get_statement_extra()
+            copies[dest] = (src, self.convert_statement if kind == 'statement' else self.copy_file)
+
+        # run copies concurrently, every job works on its own destination
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=self.copy_workers) as executor:
+            futures = [
+                executor.submit(job, src, dest)
+                for dest, (src, job) in copies.items()
+            ]
+        for future in futures:
+            future.result()
 
-        # copy statement files
-        for statement in self.polygon_config.statements:
-            src = self.source_path / statement['path']
-            dest = self.destination_path / PPS_FS_STATEMENT_PATH / statement['name']
-            if self.fs.is_exists(dest):
-                self.fs.delete_file(dest)
-            self.fs.copy_file(src, dest)
+    def convert_statement(self, src : Path, dest : str):
+        '''
+        copy one statement from polygon package and convert it to markdown unless it is up to date
+        '''
+        if self.is_fresh(dest, [src], self.statement_extra):
+            return
 
-            # convert latex to markdown
-            statement_tex = self.fs.get_file_data(dest)
+        # convert latex to markdown, written as a new file since copies may share data with source
+        statement_tex = self.source.get_file_data(src)
+        if self.statement_cache is not None:
+            statement_md = self.statement_cache.convert(statement_tex, polygon_tex_to_pps_markdown)
+        else:
             statement_md = polygon_tex_to_pps_markdown(statement_tex)
-            self.fs.set_file_data(dest, statement_md)
-
-        # copy checker files
-        src = self.source_path / self.polygon_config.checker['path']
-        dest = self.destination_path / PPS_FS_CHECKER_PATH / self.polygon_config.checker['name']
-        if self.fs.is_exists(dest):
-            self.fs.delete_file(dest)
-        self.fs.copy_file(src, dest)
-
-        # copy interactor files if needed
-        if use_interactor:
-            src = self.source_path / self.polygon_config.interactor['path']
-            dest = self.destination_path / PPS_FS_INTERACTOR_PATH / self.polygon_config.interactor['name']
-            print(f'Copy interactor file from {src} to {dest}')
-            if self.fs.is_exists(dest):
-                self.fs.delete_file(dest)
-            self.fs.copy_file(src, dest)
-
-        # copy generators
-        for generator in self.polygon_config.generators:
-            src = self.source_path / generator['path']
-            dest = self.destination_path / PPS_FS_GENERATOR_PATH / generator['name']
-            if self.fs.is_exists(dest):
-                self.fs.delete_file(dest)
-            self.fs.copy_file(src, dest)
-        
-        # copy solutions
-        for solution in self.polygon_config.solutions:
-            src = self.source_path / solution['path']
-            dest = self.destination_path / PPS_FS_SOLUTION_PATH / solution['name']
-            if self.fs.is_exists(dest):
-                self.fs.delete_file(dest)
-            self.fs.copy_file(src, dest)
-        
-        # copy validators
-        for validator in self.polygon_config.validators:
-            src = self.source_path / validator['path']
-            dest = self.destination_path / PPS_FS_VALIDATOR_PATH / validator['name']
-            if self.fs.is_exists(dest):
-                self.fs.delete_file(dest)
-            self.fs.copy_file(src, dest)
+        self.sink.write_data(dest, statement_md)
+        self.record(dest, [src], self.statement_extra)
+
+    def copy_file(self, src : Path, dest : str):
+        '''
+        copy one file from polygon package unless it is up to date
+        '''
+        if self.is_fresh(dest, [src]):
+            return
+        self.source.copy_file(src, self.sink, dest)
+        self.record(dest, [src])
+
+    def is_fresh(self, dest : str, sources : typing.List[Path], extra : str = ''):
+        '''
+        check if output in package was built from the same sources in previous run
+        '''
+        return self.incremental and self.manifest.is_fresh(self.destination_path / dest, sources, extra)
+
+    def record(self, dest : str, sources : typing.List[Path], extra : str = ''):
+        '''
+        record output in package to manifest if outputs are kept for next run
+        '''
+        if self.sink.incremental:
+            self.manifest.record(self.destination_path / dest, sources, extra)
 
     def make_pps_custom_generator(self):
         '''
         make pps custom generator if needed
         '''
+        self.generator_shards = []
+        self.generator_manuals = []
         if self.polygon_config.generator_custom_manual_count < 1:
             print('No custom generator needed\n')
             return
         
         print('Make pps custom generator...\n')
 
-        tests = []
+        # tests encoded for their size are spooled, so that shards are written without encoding them again
+        spool = ManualTestSpool(self.generator_encoding, self.generator_layout)
+        try:
+            self.write_pps_custom_generator(spool)
+        finally:
+            spool.close()
 
-        # parse manual test case
+    def write_pps_custom_generator(self, spool : ManualTestSpool):
+        '''
+        pack manual tests into pps custom generator shards and write the ones which changed
+        '''
+        # measure manual test case one by one, sizes are remembered in manifest
+        payload_key = get_manual_test_payload_key(self.generator_encoding, self.generator_layout)
+        manuals = []
+        hashes = []
         for index, manual in enumerate(self.polygon_config.generator_custom_manuals):
-            pattern = manual['input_path_pattern']
-            real_index = manual['real_index']
-            test_data = self.fs.get_file_data(
-                self.source_path / (pattern % real_index)
-            )
-            tests.append((index, test_data))
-            
+            path = self.source_path / manual.get_input_path()
+            # a changed test is hashed while it is encoded, so it is read once
+            source = self.manifest.fingerprint(path, lambda: spool.add(
+                path, self.source.get_file_byte_chunks(path, PPS_MANUAL_GENERATOR_CHUNK_SIZE),
+            ))
+            payload_size = source.setdefault('payload_size', {})
+            if payload_key not in payload_size:
+                if path not in spool:
+                    spool.add(path, self.source.get_file_byte_chunks(path, PPS_MANUAL_GENERATOR_CHUNK_SIZE))
+                payload_size[payload_key] = spool.get_size(path)
+            manuals.append(path)
+            hashes.append(source['hash'])
+
+        # store identical test case once, shared by all of its indexes
+        groups = group_manual_tests(enumerate(hashes))
+        if len(groups) < len(manuals):
+            print(f'Deduplicate {len(manuals)} manual test cases into {len(groups)} payloads\n')
+        sizes = [
+            (group, self.manifest.fingerprint(manuals[group[0]])['payload_size'][payload_key])
+            for group in groups
+        ]
 
         # make pps custom generator
-        conf = self.fs.get_file_data(self.destination_path / PPS_FS_CONFIG_NAME)
-        conf = json.loads(conf)
-        generators, indexes = make_manual_generator(tests)
-        for index, generator in enumerate(generators):
-            idx = indexes[index]
-
-            if self.fs.is_exists(self.destination_path / PPS_FS_GENERATOR_PATH / f'__pps_generator_{index}.py'):
-                self.fs.delete_file(self.destination_path / PPS_FS_GENERATOR_PATH / f'__pps_generator_{index}.py')
-            self.fs.create_file(self.destination_path / PPS_FS_GENERATOR_PATH / f'__pps_generator_{index}.py')
-            self.fs.set_file_data(
-                self.destination_path / PPS_FS_GENERATOR_PATH / f'__pps_generator_{index}.py',
-                generator
+        conf = self.pps_config
+        shards = split_manual_generator(sizes, self.generator_encoding, self.generator_layout, self.generator_packing)
+        self.generator_shards = shards
+        self.generator_manuals = manuals
+        self.shard_layout = get_manual_generator_layout(shards, sizes, self.generator_encoding, self.generator_layout)
+        print(f'Pack {len(groups)} payloads into {len(shards)} generator shards ({self.generator_packing} packing)')
+        for index, shard in enumerate(self.shard_layout):
+            print(
+                f'[SHARD] __pps_generator_{index}.py: {shard["tests"]} tests, {shard["payloads"]} payloads, '
+                f'{shard["size"] / 1024 / 1024:.2f} MiB ({shard["fill"]:.0%} of limit)'
+            )
+        print()
+        for index, shard in enumerate(shards):
+            path = f'{PPS_FS_GENERATOR_PATH}/__pps_generator_{index}.py'
+            sources = [manuals[group[0]] for group in shard]
+            extra = f'manual {self.generator_encoding} {self.generator_layout} ' + ' '.join(
+                ','.join(map(str, group)) for group in shard
             )
+
+            # rebuild shard only if one of its tests changed
+            if not self.is_fresh(path, sources, extra):
+                # stream tests straight into shard file, table layout makes a zip archive
+                if self.generator_layout == PPS_MANUAL_GENERATOR_LAYOUT_TABLE:
+                    write = self.sink.write_byte_chunks
+                else:
+                    write = self.sink.write_chunks
+                write(path, stream_encoded_manual_generator(
+                    (self.get_manual_payload(spool, group, manuals[group[0]]) for group in shard),
+                    self.generator_encoding,
+                    self.generator_layout,
+                ))
+                self.record(path, sources, extra)
+
             # add custom generator to config file
             conf['generators'].append(
                 {
@@ -165,10 +373,95 @@ class PPSCore:
                     'alias': f'__pps_generator_{index}',
                 }
             )
-            for genscript in conf['genscript']:
-                script = genscript['script']
-                spt = script.split(' ')
-                if len(spt) == 2 and spt[0] == '__pps_generator' and int(spt[1]) in idx:
-                    genscript['script'] = f'__pps_generator_{index} {spt[1]}'
-        # save config file
-        self.fs.set_file_data(self.destination_path / PPS_FS_CONFIG_NAME, json.dumps(conf, ensure_ascii=False, indent=4))
\ No newline at end of file
+            # genscript of manual tests points to their shard
+            for group in shard:
+                for i in group:
+                    self.polygon_config.generator_custom_manuals[i].shard = index
+
+    def get_manual_payload(
+        self,
+        spool : ManualTestSpool,
+        group : typing.List[int],
+        path : Path,
+    ):
+        '''
+        get encoded manual test shared by group for generator shard, from spool if it was encoded already
+        '''
+        if path in spool:
+            pieces, checksum = spool.get_payload(path)
+        else:
+            checksum = [0, 0]
+            pieces = encode_manual_test(
+                self.source.get_file_byte_chunks(path, PPS_MANUAL_GENERATOR_CHUNK_SIZE),
+                self.generator_encoding,
+                self.generator_layout,
+                checksum,
+            )
+        return group, pieces, checksum
+
+    def finalize(self):
+        '''
+        write config file, remove files of previous run which are not produced anymore and save manifest
+
+        every stage adds to the config in memory, it is encoded only here, straight into the package
+        '''
+        self.sink.write_chunks(PPS_FS_CONFIG_NAME, iter_pps_json_config(self.pps_config, self.compact_config))
+
+        # keep statement cache within its size once new statements were stored
+        if self.statement_cache is not None and self.statement_cache.misses > 0:
+            self.statement_cache.trim()
+
+        # archives and memory are written from scratch, only directories keep files of previous run
+        if not self.sink.incremental:
+            return
+        for path in self.manifest.get_stale_outputs():
+            if self.fs.is_exists(path):
+                print(f'Remove stale file {path}')
+                self.fs.delete_file(path)
+        self.manifest.save()
+
+    def verify_generators(self):
+        '''
+        run every pps custom generator for each of its manual tests and compare output with the test
+
+        outputs are compared by sha256 with the hashes of manual tests in manifest, so neither is kept in memory
+        '''
+        self.verify_report = []
+        if len(self.generator_shards) == 0:
+            print('No custom generator to verify\n')
+            return
+        # generators written into an archive cannot be run from where they are
+        if not self.sink.incremental:
+            print('[VERIFY] skipped, custom generators are run only from a directory package\n')
+            return
+
+        print('Verify pps custom generators...\n')
+        from .verify import verify_manual_generators
+        shards = []
+        for index, shard in enumerate(self.generator_shards):
+            tests = []
+            for group in shard:
+                for i in group:
+                    source = self.manifest.fingerprint(self.generator_manuals[i])
+                    tests.append((i, source['hash'], source['size']))
+            path = self.destination_path / PPS_FS_GENERATOR_PATH / f'__pps_generator_{index}.py'
+            shards.append((path, sorted(tests)))
+        self.verify_report = verify_manual_generators(shards, self.verify_workers)
+
+        mismatches = 0
+        for shard in self.verify_report:
+            print(
+                f'[VERIFY] {shard["generator"]}: {shard["tests"]} tests in {shard["elapsed"]:.2f}s '
+                f'(slowest test {shard["slowest"]}, {shard["slowest_elapsed"]:.2f}s)'
+            )
+            for mismatch in shard['mismatches']:
+                print(
+                    f'[MISMATCH] {shard["generator"]} test {mismatch["index"]}: '
+                    f'expected {mismatch["expected_size"]} bytes ({mismatch["expected_hash"][:12]}), '
+                    f'got {mismatch["size"]} bytes ({mismatch["hash"][:12]}), exit code {mismatch["returncode"]}'
+                    + (f', {mismatch["error"]}' if mismatch['error'] else '')
+                )
+            mismatches += len(shard['mismatches'])
+        print()
+        if mismatches > 0:
+            raise PPSVerifyError(f'{mismatches} manual tests are not reproduced by pps custom generators')
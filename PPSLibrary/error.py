@@ -8,4 +8,7 @@ class PPSFileExistsError(PPSError):
     pass
 
 class PPSPolygonConfigParseError(PPSError):
-    pass
\ No newline at end of file
+    pass
+
+class PPSVerifyError(PPSError):
+    pass
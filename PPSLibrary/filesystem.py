@@ -1,30 +1,157 @@
 import os
+import mmap
+import stat
 import typing
 import shutil
+import hashlib
+import weakref
+import contextlib
+import functools
 import threading
 
 from pathlib import Path
+from .constant import (
+    PPS_COPY_STRATEGY_AUTO,
+    PPS_COPY_STRATEGY_HARDLINK,
+    PPS_COPY_STRATEGY_COPY,
+)
 from .error import (
+    PPSError,
     PPSFileNotFoundError,
     PPSFileExistsError,
 )
+from .trace import (
+    traced,
+)
 
 def thread_safe(fn):
     '''
     make function thread safe
+
+    only the paths given to the function are locked (parameters named *path / *Path),
+    so operations on unrelated paths run concurrently
     '''
+    # position of every path parameter after self, read from code object without inspect
+    code = fn.__code__
+    path_names = [
+        (index - 1, name) for index, name in enumerate(code.co_varnames[:code.co_argcount])
+        if name.lower().endswith('path')
+    ]
+    @functools.wraps(fn)
     def f(self, *args, **kwargs):
-        with self.semaphore:
+        paths = [
+            args[index] if index < len(args) else kwargs[name]
+            for index, name in path_names if index < len(args) or name in kwargs
+        ]
+        # lock in sorted order so that two-path operations cannot deadlock
+        keys = sorted(set(os.path.abspath(path) for path in paths))
+        locks = [self.get_lock(key) for key in keys]
+        for lock in locks:
+            lock.acquire()
+        try:
             return fn(self, *args, **kwargs)
+        finally:
+            for lock in reversed(locks):
+                lock.release()
     return f
 
+_FICLONE = 0x40049409 # linux ioctl cloning a file on copy-on-write filesystems
+
+def _copy_hardlink(
+    source: str,
+    destination: str,
+):
+    '''
+    link destination to source, only works on the same filesystem
+    '''
+    os.link(source, destination)
+
+def _copy_reflink(
+    source: str,
+    destination: str,
+):
+    '''
+    clone source into destination sharing its blocks (btrfs, xfs, ...)
+    '''
+    import fcntl
+    with open(source, 'rb') as src, open(destination, 'wb') as dst:
+        fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+
+def _copy_file_range(
+    source: str,
+    destination: str,
+):
+    '''
+    copy source into destination inside the kernel
+    '''
+    with open(source, 'rb') as src, open(destination, 'wb') as dst:
+        size = os.fstat(src.fileno()).st_size
+        while size > 0:
+            copied = os.copy_file_range(src.fileno(), dst.fileno(), size)
+            if copied == 0:
+                break
+            size -= copied
+
+def _copy_buffered(
+    source: str,
+    destination: str,
+):
+    '''
+    copy source into destination through user space buffers
+    '''
+    shutil.copyfile(source, destination)
+
+# copy functions tried in order, the last one always works
+_copy_strategies = {
+    PPS_COPY_STRATEGY_AUTO: [_copy_reflink, _copy_file_range, _copy_buffered],
+    PPS_COPY_STRATEGY_HARDLINK: [_copy_hardlink, _copy_reflink, _copy_file_range, _copy_buffered],
+    PPS_COPY_STRATEGY_COPY: [_copy_buffered],
+}
+
+def _release_pages(
+    mapped: typing.Union[mmap.mmap, bytes],
+    start: int,
+    size: int,
+):
+    '''
+    drop pages of read only mapping which were already consumed, so they are not kept resident
+    '''
+    if isinstance(mapped, mmap.mmap) and hasattr(mmap, 'MADV_DONTNEED') and start % mmap.PAGESIZE == 0:
+        mapped.madvise(mmap.MADV_DONTNEED, start, min(size, len(mapped) - start))
+
 class FileSystem:
     '''
     custom file system class
     '''
-    def __init__(self):
-        self.semaphore = threading.BoundedSemaphore(1)
+    def __init__(
+        self,
+        copy_strategy: str = PPS_COPY_STRATEGY_AUTO,
+    ):
+        if copy_strategy not in _copy_strategies:
+            raise PPSError(f'Unknown copy strategy: {copy_strategy}')
+        self.copy_strategy = copy_strategy
+        # copy functions which failed between two devices are not tried again
+        self.unsupported_copies = set()
+        # per path locks, dropped once no operation holds them
+        self.locks = weakref.WeakValueDictionary()
+        self.locks_lock = threading.Lock()
 
+    def get_lock(
+        self,
+        key: str,
+    ):
+        '''
+        get lock of absolute path
+        '''
+        with self.locks_lock:
+            lock = self.locks.get(key)
+            if lock is None:
+                # reentrant, streamed writes may read other files while holding it
+                lock = threading.RLock()
+                self.locks[key] = lock
+            return lock
+
+    @traced
     @thread_safe
     def create_directory(
         self,
@@ -36,6 +163,7 @@ class FileSystem:
         dir_path = Path(dir_path).resolve()
         dir_path.mkdir(parents=True, exist_ok=True)
     
+    @traced
     @thread_safe
     def create_file(
         self,
@@ -49,6 +177,7 @@ class FileSystem:
             raise PPSFileExistsError
         file_path.touch()
     
+    @traced
     @thread_safe
     def copy_file(
         self,
@@ -56,16 +185,35 @@ class FileSystem:
         destinationPath : typing.Union[str, Path],
     ):
         '''
-        copy file from source to destination
+        copy file from source to destination with the copy strategy, returns number of bytes copied
         '''
-        sourcePath = Path(sourcePath).resolve()
-        destinationPath = Path(destinationPath).resolve()
-        if not sourcePath.exists() or not sourcePath.is_file():
-            raise PPSFileNotFoundError
-        if destinationPath.exists() and destinationPath.is_file():
-            raise PPSFileExistsError
-        shutil.copyfile(sourcePath, destinationPath)
+        sourcePath = os.path.abspath(sourcePath)
+        destinationPath = os.path.abspath(destinationPath)
+        try:
+            source_stat = os.stat(sourcePath)
+        except FileNotFoundError:
+            raise PPSFileNotFoundError(sourcePath)
+        if not stat.S_ISREG(source_stat.st_mode):
+            raise PPSFileNotFoundError(sourcePath)
+        if os.path.lexists(destinationPath):
+            raise PPSFileExistsError(destinationPath)
+
+        copies = _copy_strategies[self.copy_strategy]
+        devices = (source_stat.st_dev, os.stat(os.path.dirname(destinationPath)).st_dev)
+        for copy in copies:
+            if copy is not copies[-1] and (copy, devices) in self.unsupported_copies:
+                continue
+            try:
+                copy(sourcePath, destinationPath)
+                return source_stat.st_size
+            except (OSError, AttributeError, ImportError): # not supported here, try next one
+                if copy is copies[-1]:
+                    raise
+                self.unsupported_copies.add((copy, devices))
+                if os.path.lexists(destinationPath):
+                    os.remove(destinationPath)
     
+    @traced
     @thread_safe
     def get_file_data(
         self,
@@ -81,7 +229,120 @@ class FileSystem:
             return f.read()
         # raw = file_path.read_bytes()
         # return raw.decode('utf-8')
-        
+
+    @traced
+    @thread_safe
+    def get_file_chunks(
+        self,
+        file_path: typing.Union[str, Path],
+        chunk_size: int = 1024 * 1024,
+    ):
+        '''
+        get file data from path as iterator of chunks of at most chunk_size characters
+        '''
+        file_path = Path(file_path).resolve()
+        if not file_path.exists() or not file_path.is_file():
+            raise PPSFileNotFoundError
+        def read_chunks():
+            with open(file_path, 'r', encoding='utf-8') as f:
+                for chunk in iter(lambda: f.read(chunk_size), ''):
+                    yield chunk
+        return read_chunks()
+
+    @traced
+    @thread_safe
+    def get_file_bytes(
+        self,
+        file_path: typing.Union[str, Path],
+    ):
+        '''
+        get raw file data from path, without decoding
+        '''
+        file_path = Path(file_path).resolve()
+        if not file_path.exists() or not file_path.is_file():
+            raise PPSFileNotFoundError
+        with open(file_path, 'rb') as f:
+            return f.read()
+
+    @traced
+    @thread_safe
+    def map_file(
+        self,
+        file_path: typing.Union[str, Path],
+    ):
+        '''
+        get context manager mapping file read only into memory
+
+        pages are read by the kernel on access, so large files are not loaded at once
+        '''
+        file_path = Path(file_path).resolve()
+        if not file_path.exists() or not file_path.is_file():
+            raise PPSFileNotFoundError
+        @contextlib.contextmanager
+        def mapped():
+            with open(file_path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0: # empty file cannot be mapped
+                    yield b''
+                    return
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                    yield m
+        return mapped()
+
+    @traced
+    @thread_safe
+    def get_file_byte_chunks(
+        self,
+        file_path: typing.Union[str, Path],
+        chunk_size: int = 1024 * 1024,
+    ):
+        '''
+        get raw file data from path as iterator of chunks of at most chunk_size bytes
+        '''
+        mapped = self.map_file(file_path)
+        def read_chunks():
+            with mapped as m:
+                for start in range(0, len(m), chunk_size):
+                    chunk = m[start:start + chunk_size]
+                    _release_pages(m, start, chunk_size)
+                    yield chunk
+        return read_chunks()
+
+    @traced(read_size=True)
+    @thread_safe
+    def get_file_hash(
+        self,
+        file_path: typing.Union[str, Path],
+        chunk_size: int = 1024 * 1024,
+    ):
+        '''
+        get sha256 hex digest of file, hashing mapped file chunk by chunk without copying it
+        '''
+        digest = hashlib.sha256()
+        with self.map_file(file_path) as m:
+            view = memoryview(m)
+            try:
+                for start in range(0, len(view), chunk_size):
+                    digest.update(view[start:start + chunk_size])
+                    _release_pages(m, start, chunk_size)
+            finally:
+                view.release()
+        return digest.hexdigest()
+
+    @traced
+    @thread_safe
+    def get_file_stat(
+        self,
+        file_path: typing.Union[str, Path],
+    ):
+        '''
+        get stat result of file, None if file does not exist
+        '''
+        file_path = Path(file_path).resolve()
+        if not file_path.exists() or not file_path.is_file():
+            return None
+        return file_path.stat()
+
+    @traced
     @thread_safe
     def set_file_data(
         self,
@@ -96,7 +357,66 @@ class FileSystem:
             raise PPSFileNotFoundError
         with open(file_path, 'w', encoding='utf-8') as f:
             return f.write(data)
+
+    @traced
+    @thread_safe
+    def set_file_chunks(
+        self,
+        file_path: typing.Union[str, Path],
+        chunks: typing.Iterable[str],
+    ):
+        '''
+        set file data from path, writing chunks as they are produced
+
+        newlines are written as is
+        '''
+        file_path = Path(file_path).resolve()
+        if not file_path.exists() or not file_path.is_file():
+            raise PPSFileNotFoundError
+        size = 0
+        with open(file_path, 'w', encoding='utf-8', newline='\n') as f:
+            for chunk in chunks:
+                size += f.write(chunk)
+        return size
+
+    @traced
+    @thread_safe
+    def set_file_byte_chunks(
+        self,
+        file_path: typing.Union[str, Path],
+        chunks: typing.Iterable[bytes],
+    ):
+        '''
+        set raw file data from path, writing chunks as they are produced
+        '''
+        file_path = Path(file_path).resolve()
+        if not file_path.exists() or not file_path.is_file():
+            raise PPSFileNotFoundError
+        size = 0
+        with open(file_path, 'wb') as f:
+            for chunk in chunks:
+                size += f.write(chunk)
+        return size
+    
+    @traced
+    @thread_safe
+    def set_file_stream(
+        self,
+        file_path: typing.Union[str, Path],
+        stream: typing.BinaryIO,
+        chunk_size: int = 1024 * 1024,
+    ):
+        '''
+        set raw file data from path, copying binary file object chunk by chunk
+        '''
+        file_path = Path(file_path).resolve()
+        if not file_path.exists() or not file_path.is_file():
+            raise PPSFileNotFoundError
+        with open(file_path, 'wb') as f:
+            shutil.copyfileobj(stream, f, chunk_size)
+            return f.tell()
     
+    @traced
     @thread_safe
     def delete_file(
         self,
@@ -110,6 +430,7 @@ class FileSystem:
             raise PPSFileNotFoundError
         os.remove(file_path)
 
+    @traced
     @thread_safe
     def delete_directory(
         self,
@@ -123,6 +444,7 @@ class FileSystem:
             raise PPSFileNotFoundError
         shutil.rmtree(dir_path)
     
+    @traced
     @thread_safe
     def is_exists(
         self,
@@ -0,0 +1,206 @@
+import json
+import typing
+import hashlib
+
+from pathlib import Path
+
+from .constant import (
+    PPS_FS_MANIFEST_NAME,
+    PPS_MANIFEST_VERSION,
+)
+from .error import (
+    PPSFileNotFoundError,
+)
+from .filesystem import (
+    FileSystem,
+)
+from .source import (
+    PackageSource,
+)
+
+class Manifest:
+    '''
+    content-hash manifest of a generated pps package
+
+    remembers the sources (path, size, mtime, hash) every output was built from,
+    so that outputs whose sources did not change can be skipped on the next run,
+    sources are read through source (file system by default) and outputs through file system
+    '''
+    def __init__(
+        self,
+        fs : FileSystem,
+        destination_path : typing.Union[str, Path],
+        source : typing.Optional[PackageSource] = None,
+    ):
+        self.fs = fs
+        self.source = source if source is not None else fs
+        self.destination_path = Path(destination_path)
+        self.manifest_path = self.destination_path / PPS_FS_MANIFEST_NAME
+        self.previous_sources = {}
+        self.previous_outputs = {}
+        self.sources = {}
+        self.outputs = {}
+
+    def load(self):
+        '''
+        load manifest of previous run if exists
+        '''
+        if not self.fs.is_exists(self.manifest_path):
+            return
+        try:
+            data = json.loads(self.fs.get_file_data(self.manifest_path))
+        except ValueError: # broken manifest, rebuild everything
+            return
+        if not isinstance(data, dict) or data.get('version') != PPS_MANIFEST_VERSION:
+            return
+        self.previous_sources = {source['path']: source for source in data.get('sources', [])}
+        self.previous_outputs = {output['output']: output for output in data.get('outputs', [])}
+
+    def save(self):
+        '''
+        save manifest of this run
+        '''
+        data = {
+            'version': PPS_MANIFEST_VERSION,
+            'sources': sorted(self.sources.values(), key=lambda source: source['path']),
+            'outputs': sorted(self.outputs.values(), key=lambda output: output['output']),
+        }
+        if self.fs.is_exists(self.manifest_path):
+            self.fs.delete_file(self.manifest_path)
+        self.fs.create_file(self.manifest_path)
+        self.fs.set_file_data(self.manifest_path, json.dumps(data, ensure_ascii=False, indent=4))
+
+    def fingerprint(
+        self,
+        source_path : typing.Union[str, Path],
+        get_hash : typing.Optional[typing.Callable[[], str]] = None,
+    ):
+        '''
+        get manifest entry of source file
+
+        the hash of previous run is reused when size and mtime did not change,
+        otherwise it is got from get_hash if given, so a caller reading the file anyway can hash it on the way
+        '''
+        source_path = str(Path(source_path).resolve())
+        if source_path in self.sources:
+            return self.sources[source_path]
+        stat = self.source.get_file_stat(source_path)
+        if stat is None:
+            raise PPSFileNotFoundError(source_path)
+
+        previous = self.previous_sources.get(source_path)
+        if previous is not None and previous['size'] == stat.st_size and previous['mtime'] == stat.st_mtime_ns:
+            source = dict(previous)
+        else:
+            source = {
+                'path': source_path,
+                'size': stat.st_size,
+                'mtime': stat.st_mtime_ns,
+                'hash': get_hash() if get_hash is not None else self.source.get_file_hash(source_path),
+            }
+            if previous is not None and previous['hash'] == source['hash']: # touched only
+                source = dict(previous, size=source['size'], mtime=source['mtime'])
+        self.sources[source_path] = source
+        return source
+
+    def is_fresh(
+        self,
+        output_path : typing.Union[str, Path],
+        source_paths : typing.List[typing.Union[str, Path]],
+        extra : str = '',
+    ):
+        '''
+        check if output was built from the same sources in previous run
+
+        fresh outputs are carried over to the manifest of this run
+        '''
+        output = self.get_output_name(output_path)
+        previous = self.previous_outputs.get(output)
+        if previous is None:
+            return False
+        stat = self.fs.get_file_stat(output_path)
+        if stat is None or stat.st_size != previous['size']:
+            return False
+        if previous['key'] != self.get_key(source_paths, extra):
+            return False
+        self.outputs[output] = previous
+        return True
+
+    def record(
+        self,
+        output_path : typing.Union[str, Path],
+        source_paths : typing.List[typing.Union[str, Path]],
+        extra : str = '',
+    ):
+        '''
+        record output built from sources in this run
+        '''
+        output = self.get_output_name(output_path)
+        self.outputs[output] = {
+            'output': output,
+            'sources': [self.fingerprint(source_path)['path'] for source_path in source_paths],
+            'key': self.get_key(source_paths, extra),
+            'size': self.fs.get_file_stat(output_path).st_size,
+        }
+
+    def checkpoint(
+        self,
+        source_paths : typing.Optional[typing.List[typing.Union[str, Path]]] = None,
+    ):
+        '''
+        start next run from this run, as if manifest was saved and loaded again
+
+        fingerprints of changed sources (every source if None) are made again,
+        the others are reused without looking at the files
+        '''
+        self.previous_sources.update(self.sources)
+        self.previous_outputs = self.outputs
+        self.outputs = {}
+        if source_paths is None:
+            self.sources = {}
+            return
+        for source_path in source_paths:
+            self.sources.pop(str(Path(source_path).resolve()), None)
+
+    def get_stale_outputs(self):
+        '''
+        get outputs of previous run which are not produced anymore
+        '''
+        return [
+            self.destination_path / output
+            for output in self.previous_outputs if output not in self.outputs
+        ]
+
+    def get_key(
+        self,
+        source_paths : typing.List[typing.Union[str, Path]],
+        extra : str = '',
+    ):
+        '''
+        get build key of output from source hashes and build options
+        '''
+        return self.make_key([self.fingerprint(source_path)['hash'] for source_path in source_paths], extra)
+
+    @staticmethod
+    def make_key(
+        hashes : typing.List[str],
+        extra : str = '',
+    ):
+        '''
+        get build key of output from hashes of its sources and build options
+        '''
+        digest = hashlib.sha256()
+        for source_hash in hashes:
+            digest.update(source_hash.encode())
+            digest.update(b'\0')
+        digest.update(extra.encode())
+        return digest.hexdigest()
+
+    def get_output_name(
+        self,
+        output_path : typing.Union[str, Path],
+    ):
+        '''
+        get output path relative to destination
+        '''
+        return Path(output_path).resolve().relative_to(self.destination_path.resolve()).as_posix()
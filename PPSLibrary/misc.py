@@ -1,5 +1,23 @@
 import typing
-import latex2markdown
+
+from .constant import (
+    PPS_MANUAL_GENERATOR_SIZE_LIMIT,
+    PPS_MANUAL_GENERATOR_CHUNK_SIZE,
+    PPS_MANUAL_GENERATOR_ENCODING_REPR,
+    PPS_MANUAL_GENERATOR_ENCODING_ZLIB,
+    PPS_MANUAL_GENERATOR_ENCODING_LZMA,
+    PPS_MANUAL_GENERATOR_ENCODINGS,
+    PPS_MANUAL_GENERATOR_LAYOUT_CHAIN,
+    PPS_MANUAL_GENERATOR_LAYOUT_TABLE,
+    PPS_MANUAL_GENERATOR_LAYOUTS,
+    PPS_MANUAL_GENERATOR_PACKING_ORDER,
+    PPS_MANUAL_GENERATOR_PACKING_BALANCED,
+    PPS_MANUAL_GENERATOR_PACKINGS,
+    PPS_OUTPUT_SPOOL_SIZE,
+)
+from .error import (
+    PPSError,
+)
 
 def compress_str(
     message : str,
@@ -12,34 +30,800 @@ def compress_str(
         return message[:length] + '...'
     return message
 
+def compress_list(
+    items : typing.Iterable,
+    length : int = 200
+):
+    '''
+    compress string of list to length, without making string of the whole list
+    '''
+    message = '['
+    for index, item in enumerate(items):
+        message += (', ' if index > 0 else '') + repr(item)
+        if len(message) > length:
+            return compress_str(message, length)
+    return compress_str(message + ']', length)
+
+_manual_generator_prefix = '# -*- coding: utf-8 -*-\nimport sys\nt = int(sys.argv[1])\n'
+
+# decoder of compressed payloads, defined in generated script
+_manual_generator_decoders = {
+    PPS_MANUAL_GENERATOR_ENCODING_REPR: '',
+    PPS_MANUAL_GENERATOR_ENCODING_ZLIB: (
+        'import base64, zlib\n'
+        'def d(s):\n'
+        ' return zlib.decompress(base64.b64decode(s))\n'
+    ),
+    PPS_MANUAL_GENERATOR_ENCODING_LZMA: (
+        'import base64, lzma\n'
+        'def d(s):\n'
+        ' return lzma.decompress(base64.b64decode(s))\n'
+    ),
+}
+
+# table layout is a zip archive which python runs as a zipapp, payloads are its members
+# and its __main__.py reads the requested one by offset, so the interpreter never reads the others
+_manual_generator_archive_main = (
+    '# -*- coding: utf-8 -*-\n'
+    'import sys\n'
+    't = int(sys.argv[1])\n'
+    '{decoder}'
+    'e = {{{table}}}.get(t)\n'
+    'if e is not None:\n'
+    ' with open(sys.argv[0], "rb") as f:\n'
+    '  f.seek(e[0])\n'
+    '  n = e[1]\n'
+    '  while n > 0:\n'
+    '   s = f.read(min(n, 1048576))\n'
+    '   if not s:\n'
+    '    break\n'
+    '   n -= len(s)\n'
+    '   sys.stdout.buffer.write(d(s))\n'
+    '  sys.stdout.buffer.write(z())\n'
+)
+_manual_generator_archive_entry = '{index}: ({offset}, {size}), '
+_manual_generator_archive_main_name = '__main__.py'
+
+# zip compression method of payload members and decoder of their raw stream, defined in __main__.py
+_manual_generator_archive_methods = {
+    PPS_MANUAL_GENERATOR_ENCODING_REPR: 0, # stored
+    PPS_MANUAL_GENERATOR_ENCODING_ZLIB: 8, # deflated
+    PPS_MANUAL_GENERATOR_ENCODING_LZMA: 14,
+}
+_manual_generator_archive_decoders = {
+    PPS_MANUAL_GENERATOR_ENCODING_REPR: (
+        'def d(s):\n'
+        ' return s\n'
+        'def z():\n'
+        ' return b""\n'
+    ),
+    PPS_MANUAL_GENERATOR_ENCODING_ZLIB: (
+        'import zlib\n'
+        'o = zlib.decompressobj(-15)\n'
+        'd = o.decompress\n'
+        'z = o.flush\n'
+    ),
+    PPS_MANUAL_GENERATOR_ENCODING_LZMA: (
+        'import lzma\n'
+        'o = lzma.LZMADecompressor(lzma.FORMAT_RAW, filters=[{{"id": lzma.FILTER_LZMA1, "dict_size": {dict_size}}}])\n'
+        'd = o.decompress\n'
+        'def z():\n'
+        ' return b""\n'
+    ),
+}
+# lzma members are raw lzma1 streams after a header of lzma sdk version and properties (lc=3 lp=0 pb=2)
+_manual_generator_archive_lzma_dict_size = 8 * 1024 * 1024
+_manual_generator_archive_lzma_header_size = 9
+
+# zip headers, members are dated 1980-01-01 so that the same tests make the same archive
+_zip_local_header = '<4s5H3L2H'
+_zip_local_header_size = 30
+_zip_data_descriptor = '<4s3L'
+_zip_data_descriptor_size = 16
+_zip_central_header = '<4s6H3L5H2L'
+_zip_central_header_size = 46
+_zip_end_record = '<4s4H2LH'
+_zip_end_record_size = 22
+_zip_date = (1 << 5) | 1
+
+def _as_indexes(
+    indexes : typing.Union[int, typing.List[int]],
+):
+    '''
+    get list of test indexes sharing one payload
+    '''
+    if isinstance(indexes, int):
+        return [indexes]
+    return list(indexes)
+
+def _check_manual_generator_options(
+    encoding : str,
+    layout : str,
+):
+    '''
+    check encoding and layout of manual data generator
+    '''
+    if encoding not in PPS_MANUAL_GENERATOR_ENCODINGS:
+        raise PPSError(f'Unknown manual generator encoding: {encoding}')
+    if layout not in PPS_MANUAL_GENERATOR_LAYOUTS:
+        raise PPSError(f'Unknown manual generator layout: {layout}')
+
+def _decode_payload(
+    payload : str,
+    encoding : str,
+):
+    '''
+    wrap payload expression with decoder call if needed
+    '''
+    if encoding != PPS_MANUAL_GENERATOR_ENCODING_REPR:
+        return f'd({payload})'
+    return payload
+
+def make_manual_generator_prefix(
+    encoding : str = PPS_MANUAL_GENERATOR_ENCODING_REPR,
+):
+    '''
+    make header of manual data generator of chain layout
+    '''
+    _check_manual_generator_options(encoding, PPS_MANUAL_GENERATOR_LAYOUT_CHAIN)
+    return _manual_generator_prefix + _manual_generator_decoders[encoding]
+
+def make_manual_generator_archive_main(
+    table : typing.Dict[int, typing.Tuple[int, int]],
+    encoding : str = PPS_MANUAL_GENERATOR_ENCODING_REPR,
+):
+    '''
+    make __main__.py of manual data generator of table layout,
+    table gives offset and size of raw stream of payload in the archive for every test index
+    '''
+    _check_manual_generator_options(encoding, PPS_MANUAL_GENERATOR_LAYOUT_TABLE)
+    return _manual_generator_archive_main.format(
+        decoder=_manual_generator_archive_decoders[encoding].format(
+            dict_size=_manual_generator_archive_lzma_dict_size,
+        ),
+        table=''.join(
+            _manual_generator_archive_entry.format(index=index, offset=offset, size=size)
+            for index, (offset, size) in table.items()
+        ),
+    )
+
+def make_manual_generator_entry(
+    indexes : typing.Union[int, typing.List[int]],
+    payload : str,
+    encoding : str = PPS_MANUAL_GENERATOR_ENCODING_REPR,
+):
+    '''
+    make branch of manual data generator writing payload literal for test indexes
+    '''
+    indexes = _as_indexes(indexes)
+    if len(indexes) == 1:
+        condition = f't == {indexes[0]}'
+    else:
+        condition = f't in ({", ".join(map(str, indexes))})'
+    return f'if {condition}:\n sys.stdout.buffer.write({_decode_payload(payload, encoding)})\n'
+
+def _as_bytes(
+    chunk : typing.Union[str, bytes],
+):
+    '''
+    get raw bytes of test data chunk, text is encoded in utf-8
+    '''
+    if isinstance(chunk, str):
+        return chunk.encode('utf-8')
+    return bytes(chunk)
+
+def escape_manual_test(
+    chunks : typing.Iterable[bytes],
+    separator : str = '\n ',
+):
+    '''
+    escape test data into python bytes literal pieces, chunk by chunk
+
+    pieces are adjacent literals, so python joins them back when parsing,
+    bytes literals are ascii only whatever the test data is
+    '''
+    first = True
+    for chunk in chunks:
+        chunk = _as_bytes(chunk)
+        # str repr of ascii text is escaped the same way and runs much faster
+        piece = 'b' + repr(chunk.decode('ascii')) if chunk.isascii() else repr(chunk)
+        yield piece if first else separator + piece
+        first = False
+    if first: # empty test
+        yield repr(b'')
+
+def compress_manual_test(
+    chunks : typing.Iterable[bytes],
+    encoding : str,
+    separator : str = '\n ',
+):
+    '''
+    compress test data and encode it into base64 string literal pieces, chunk by chunk
+    '''
+    import base64 # compression modules are imported only for the encoding in use
+    if encoding == PPS_MANUAL_GENERATOR_ENCODING_ZLIB:
+        import zlib
+        compressor = zlib.compressobj(9)
+    elif encoding == PPS_MANUAL_GENERATOR_ENCODING_LZMA:
+        import lzma
+        compressor = lzma.LZMACompressor()
+    else:
+        raise PPSError(f'Unknown manual generator encoding: {encoding}')
+
+    def compressed():
+        for chunk in chunks:
+            yield compressor.compress(_as_bytes(chunk))
+        yield compressor.flush()
+
+    # base64 works on 3 byte groups, so carry the remainder to the next piece
+    first = True
+    buffer = bytearray()
+    for data in compressed():
+        buffer += data
+        if len(buffer) < PPS_MANUAL_GENERATOR_CHUNK_SIZE:
+            continue
+        cut = len(buffer) - len(buffer) % 3
+        piece = repr(base64.b64encode(buffer[:cut]).decode('ascii'))
+        yield piece if first else separator + piece
+        first = False
+        del buffer[:cut]
+    if len(buffer) > 0 or first:
+        piece = repr(base64.b64encode(buffer).decode('ascii'))
+        yield piece if first else separator + piece
+
+def compress_manual_test_member(
+    chunks : typing.Iterable[bytes],
+    encoding : str,
+    checksum : typing.Optional[typing.List[int]] = None,
+):
+    '''
+    compress test data into data of zip member of table layout, chunk by chunk
+
+    repr stores test data as it is, crc32 and size of test data are left in checksum if given
+    '''
+    import zlib # crc32 of every member, compression modules are imported only for the encoding in use
+    if encoding == PPS_MANUAL_GENERATOR_ENCODING_REPR:
+        compressor = None
+    elif encoding == PPS_MANUAL_GENERATOR_ENCODING_ZLIB:
+        compressor = zlib.compressobj(9, zlib.DEFLATED, -15)
+    elif encoding == PPS_MANUAL_GENERATOR_ENCODING_LZMA:
+        import lzma
+        import struct
+        compressor = lzma.LZMACompressor(lzma.FORMAT_RAW, filters=[
+            {'id': lzma.FILTER_LZMA1, 'dict_size': _manual_generator_archive_lzma_dict_size},
+        ])
+        yield struct.pack('<BBHBI', 9, 4, 5, (2 * 5 + 0) * 9 + 3, _manual_generator_archive_lzma_dict_size)
+    else:
+        raise PPSError(f'Unknown manual generator encoding: {encoding}')
+
+    crc = 0
+    size = 0
+    for chunk in chunks:
+        chunk = _as_bytes(chunk)
+        crc = zlib.crc32(chunk, crc)
+        size += len(chunk)
+        data = chunk if compressor is None else compressor.compress(chunk)
+        if len(data) > 0:
+            yield data
+    if compressor is not None:
+        yield compressor.flush()
+    if checksum is not None:
+        checksum[:] = [crc, size]
+
+def encode_manual_test(
+    chunks : typing.Iterable[bytes],
+    encoding : str = PPS_MANUAL_GENERATOR_ENCODING_REPR,
+    layout : str = PPS_MANUAL_GENERATOR_LAYOUT_CHAIN,
+    checksum : typing.Optional[typing.List[int]] = None,
+):
+    '''
+    encode test data into python string literal pieces for manual data generator,
+    or into bytes of zip member for table layout, whose crc32 and size are left in checksum if given
+    '''
+    if layout == PPS_MANUAL_GENERATOR_LAYOUT_TABLE:
+        return compress_manual_test_member(chunks, encoding, checksum)
+    if encoding == PPS_MANUAL_GENERATOR_ENCODING_REPR:
+        return escape_manual_test(chunks)
+    return compress_manual_test(chunks, encoding)
+
+def measure_manual_test(
+    chunks : typing.Iterable[bytes],
+    encoding : str = PPS_MANUAL_GENERATOR_ENCODING_REPR,
+    layout : str = PPS_MANUAL_GENERATOR_LAYOUT_CHAIN,
+):
+    '''
+    get length of encoded test data without keeping it
+    '''
+    return sum(len(piece) for piece in encode_manual_test(chunks, encoding, layout))
+
+def get_manual_test_payload_key(
+    encoding : str = PPS_MANUAL_GENERATOR_ENCODING_REPR,
+    layout : str = PPS_MANUAL_GENERATOR_LAYOUT_CHAIN,
+):
+    '''
+    get key of encoded test data length in manifest, lengths of chain layout are keyed by encoding only
+    '''
+    if layout == PPS_MANUAL_GENERATOR_LAYOUT_TABLE:
+        return f'{encoding} {layout}'
+    return encoding
+
+def estimate_manual_test(
+    size : int,
+    encoding : str = PPS_MANUAL_GENERATOR_ENCODING_REPR,
+    layout : str = PPS_MANUAL_GENERATOR_LAYOUT_CHAIN,
+):
+    '''
+    get upper bound of length of encoded test data from its size without reading it
+
+    repr escapes a byte into at most 4 characters, data which does not compress grows a little
+    when compressed and base64 makes 4 characters of 3 bytes,
+    every piece is a literal of its own, quotes and separator are counted for each of them,
+    table layout stores repr data as it is and raw lzma1 grows incompressible data by up to 1.5%
+    '''
+    if layout == PPS_MANUAL_GENERATOR_LAYOUT_TABLE:
+        if encoding == PPS_MANUAL_GENERATOR_ENCODING_REPR:
+            return size
+        if encoding == PPS_MANUAL_GENERATOR_ENCODING_ZLIB:
+            return size + size // 1024 + 64
+        if encoding == PPS_MANUAL_GENERATOR_ENCODING_LZMA:
+            return size + size // 32 + 64 + _manual_generator_archive_lzma_header_size
+        raise PPSError(f'Unknown manual generator encoding: {encoding}')
+    if encoding == PPS_MANUAL_GENERATOR_ENCODING_REPR:
+        return 4 * size + 5 * max(1, -(-size // PPS_MANUAL_GENERATOR_CHUNK_SIZE))
+    if encoding in [PPS_MANUAL_GENERATOR_ENCODING_ZLIB, PPS_MANUAL_GENERATOR_ENCODING_LZMA]:
+        compressed = size + size // 1024 + 64
+        return 4 * -(-compressed // 3) + 5 * (-(-compressed // PPS_MANUAL_GENERATOR_CHUNK_SIZE) + 1)
+    raise PPSError(f'Unknown manual generator encoding: {encoding}')
+
+class ManualTestSpool:
+    '''
+    encoded test data kept from measuring until generator shards are written, so every test is encoded once
+
+    payloads are appended to one temporary file, which stays in memory until it grows over max size,
+    test data is hashed while it is encoded, so a test read for its payload is not read again for its hash
+    '''
+    def __init__(
+        self,
+        encoding : str = PPS_MANUAL_GENERATOR_ENCODING_REPR,
+        layout : str = PPS_MANUAL_GENERATOR_LAYOUT_CHAIN,
+        max_size : int = PPS_OUTPUT_SPOOL_SIZE,
+    ):
+        import tempfile # only needed once a manual test is encoded
+        _check_manual_generator_options(encoding, layout)
+        self.encoding = encoding
+        self.layout = layout
+        self.file = tempfile.SpooledTemporaryFile(max_size=max_size)
+        self.payloads = {} # offset, length and checksum of encoded test data by key
+
+    def __contains__(
+        self,
+        key : typing.Hashable,
+    ):
+        return key in self.payloads
+
+    def add(
+        self,
+        key : typing.Hashable,
+        chunks : typing.Iterable[bytes],
+    ):
+        '''
+        encode test data into spool, returns sha256 hex digest of test data
+        '''
+        import hashlib
+        digest = hashlib.sha256()
+        def hashed():
+            for chunk in chunks:
+                digest.update(chunk)
+                yield chunk
+
+        checksum = [0, 0]
+        offset = self.file.seek(0, 2)
+        for piece in encode_manual_test(hashed(), self.encoding, self.layout, checksum):
+            # pieces of chain layout are ascii text
+            self.file.write(piece.encode('ascii') if isinstance(piece, str) else piece)
+        self.payloads[key] = (offset, self.file.tell() - offset, checksum)
+        return digest.hexdigest()
+
+    def get_size(
+        self,
+        key : typing.Hashable,
+    ):
+        '''
+        get length of encoded test data in spool
+        '''
+        return self.payloads[key][1]
+
+    def get_payload(
+        self,
+        key : typing.Hashable,
+    ):
+        '''
+        get encoded test data in spool as pieces and its checksum, pieces are read lazily
+        '''
+        offset, size, checksum = self.payloads[key]
+        text = self.layout != PPS_MANUAL_GENERATOR_LAYOUT_TABLE
+        def read_pieces():
+            position = offset
+            end = offset + size
+            while position < end:
+                self.file.seek(position)
+                piece = self.file.read(min(end - position, PPS_MANUAL_GENERATOR_CHUNK_SIZE))
+                position += len(piece)
+                yield piece.decode('ascii') if text else piece
+        return read_pieces(), checksum
+
+    def close(self):
+        '''
+        drop encoded test data
+        '''
+        self.file.close()
+        self.payloads = {}
+
+def _manual_generator_entry_size(
+    indexes : typing.List[int],
+    size : int,
+    encoding : str,
+    layout : str,
+):
+    '''
+    get approximate length one payload adds to manual data generator
+    '''
+    if layout == PPS_MANUAL_GENERATOR_LAYOUT_TABLE:
+        # zip member named by its first test, its headers and its table entries,
+        # offsets are bounded by the size limit
+        offset = PPS_MANUAL_GENERATOR_SIZE_LIMIT
+        return (
+            _zip_local_header_size + _zip_data_descriptor_size + _zip_central_header_size
+            + 2 * len(str(indexes[0])) + size + sum(
+                len(_manual_generator_archive_entry.format(index=index, offset=offset, size=offset))
+                for index in indexes
+            )
+        )
+    return len(make_manual_generator_entry(indexes, '', encoding)) + size
+
+def _manual_generator_prefix_size(
+    encoding : str,
+    layout : str,
+):
+    '''
+    get length of manual data generator without payloads
+    '''
+    if layout == PPS_MANUAL_GENERATOR_LAYOUT_TABLE:
+        name_size = len(_manual_generator_archive_main_name)
+        return (
+            len(make_manual_generator_archive_main({}, encoding).encode('utf-8'))
+            + _zip_local_header_size + _zip_central_header_size + 2 * name_size + _zip_end_record_size
+        )
+    return len(make_manual_generator_prefix(encoding))
+
+def _pack_first_fit_decreasing(
+    entries : typing.List[typing.Tuple[typing.List[int], int]],
+    capacity : int,
+):
+    '''
+    pack entries into as few shards as first fit decreasing finds, as lists of entry positions
+    '''
+    shards = []
+    loads = []
+    for position in sorted(range(len(entries)), key=lambda position: -entries[position][1]):
+        size = entries[position][1]
+        for shard, load in enumerate(loads):
+            if load + size <= capacity:
+                shards[shard].append(position)
+                loads[shard] += size
+                break
+        else:
+            shards.append([position])
+            loads.append(size)
+    return shards
+
+def _pack_balanced(
+    entries : typing.List[typing.Tuple[typing.List[int], int]],
+    capacity : int,
+    count : int,
+):
+    '''
+    pack entries into count shards of even size, largest entry into least filled shard,
+    as lists of entry positions, None if some entry does not fit
+    '''
+    import heapq
+    shards = [[] for _ in range(count)]
+    loads = [(0, shard) for shard in range(count)]
+    for position in sorted(range(len(entries)), key=lambda position: -entries[position][1]):
+        size = entries[position][1]
+        load, shard = loads[0]
+        if load + size > capacity: # least filled shard is full, so is every other
+            return None
+        shards[shard].append(position)
+        heapq.heapreplace(loads, (load + size, shard))
+    return shards
+
+def split_manual_generator(
+    sizes : typing.List[typing.Tuple[typing.Union[int, typing.List[int]], int]],
+    encoding : str = PPS_MANUAL_GENERATOR_ENCODING_REPR,
+    layout : str = PPS_MANUAL_GENERATOR_LAYOUT_CHAIN,
+    packing : str = PPS_MANUAL_GENERATOR_PACKING_ORDER,
+):
+    '''
+    split manual tests into generator shards by encoded payload size
+
+    sizes are given per payload with the indexes of tests sharing it,
+    order packing starts a new shard whenever the next payload would exceed the size limit,
+    compact packing fills shards first fit decreasing to make as few shards as it can,
+    balanced packing makes as many shards as compact packing and evens out their sizes,
+    payloads larger than the limit get a shard of their own,
+    payloads keep test order within a shard and shards are ordered by their first test
+    '''
+    if packing not in PPS_MANUAL_GENERATOR_PACKINGS:
+        raise PPSError(f'Unknown manual generator packing: {packing}')
+    prefix_size = _manual_generator_prefix_size(encoding, layout)
+    if packing == PPS_MANUAL_GENERATOR_PACKING_ORDER:
+        indexes = []
+        idx = []
+        glen = prefix_size
+        for index, size in sizes:
+            index = _as_indexes(index)
+            elen = _manual_generator_entry_size(index, size, encoding, layout)
+            if len(idx) > 0 and glen + elen > PPS_MANUAL_GENERATOR_SIZE_LIMIT:
+                indexes.append(idx)
+                idx = [index]
+                glen = prefix_size + elen
+            else:
+                idx.append(index)
+                glen += elen
+        if len(idx) > 0:
+            indexes.append(idx)
+
+        return indexes
+
+    capacity = PPS_MANUAL_GENERATOR_SIZE_LIMIT - prefix_size
+    entries = []
+    oversized = [] # shards of a single payload larger than the limit
+    for index, size in sizes:
+        index = _as_indexes(index)
+        elen = _manual_generator_entry_size(index, size, encoding, layout)
+        if elen > capacity:
+            oversized.append([len(entries)])
+        entries.append((index, elen))
+    fitting = [position for position in range(len(entries)) if entries[position][1] <= capacity]
+    packed = [[fitting[position] for position in shard] for shard in _pack_first_fit_decreasing(
+        [entries[position] for position in fitting], capacity,
+    )]
+    if packing == PPS_MANUAL_GENERATOR_PACKING_BALANCED and len(packed) > 1:
+        # if shards are too full to balance, they are nearly even already except the last one
+        balanced = _pack_balanced([entries[position] for position in fitting], capacity, len(packed))
+        if balanced is not None:
+            packed = [[fitting[position] for position in shard] for shard in balanced]
+
+    shards = sorted(sorted(shard) for shard in packed + oversized)
+    return [[entries[position][0] for position in shard] for shard in shards]
+
+def get_manual_generator_layout(
+    shards : typing.List[typing.List[typing.Union[int, typing.List[int]]]],
+    sizes : typing.List[typing.Tuple[typing.Union[int, typing.List[int]], int]],
+    encoding : str = PPS_MANUAL_GENERATOR_ENCODING_REPR,
+    layout : str = PPS_MANUAL_GENERATOR_LAYOUT_CHAIN,
+):
+    '''
+    get tests, payloads and approximate size of every generator shard, as split from sizes
+    '''
+    payload_sizes = {_as_indexes(index)[0]: size for index, size in sizes}
+    prefix_size = _manual_generator_prefix_size(encoding, layout)
+    report = []
+    for shard in shards:
+        groups = [_as_indexes(index) for index in shard]
+        size = prefix_size + sum(
+            _manual_generator_entry_size(group, payload_sizes[group[0]], encoding, layout)
+            for group in groups
+        )
+        report.append({
+            'tests': sum(len(group) for group in groups),
+            'payloads': len(groups),
+            'size': size,
+            'fill': size / PPS_MANUAL_GENERATOR_SIZE_LIMIT,
+        })
+    return report
+
+def _stream_chain_manual_generator(
+    payloads : typing.Iterable[typing.Tuple[int, typing.Iterable[str], typing.List[int]]],
+    encoding : str,
+):
+    '''
+    stream manual data generator made of one branch per test
+    '''
+    yield make_manual_generator_prefix(encoding)
+    for index, pieces, _ in payloads:
+        head, tail = make_manual_generator_entry(index, '\0', encoding).split('\0')
+        yield head
+        yield from pieces
+        yield tail
+
+def _pack_zip_local_header(
+    name : bytes,
+    method : int,
+    flags : int,
+    crc : int,
+    compressed_size : int,
+    size : int,
+):
+    '''
+    pack local header of zip member
+    '''
+    import struct
+    version = 63 if method == 14 else 20
+    return struct.pack(
+        _zip_local_header, b'PK\x03\x04', version, flags, method, 0, _zip_date,
+        crc, compressed_size, size, len(name), 0,
+    ) + name
+
+def _pack_zip_central_header(
+    name : bytes,
+    method : int,
+    flags : int,
+    crc : int,
+    compressed_size : int,
+    size : int,
+    offset : int,
+):
+    '''
+    pack central directory header of zip member whose local header is at offset
+    '''
+    import struct
+    if max(compressed_size, size, offset) >= 1 << 32:
+        raise PPSError('Manual generator of table layout cannot be larger than 4 GiB')
+    version = 63 if method == 14 else 20
+    return struct.pack(
+        _zip_central_header, b'PK\x01\x02', (3 << 8) | version, version, flags, method, 0, _zip_date,
+        crc, compressed_size, size, len(name), 0, 0, 0, 0, 0o644 << 16, offset,
+    ) + name
+
+def _stream_table_manual_generator(
+    payloads : typing.Iterable[typing.Tuple[int, typing.Iterable[bytes], typing.List[int]]],
+    encoding : str,
+):
+    '''
+    stream manual data generator as zip archive of payload members and __main__.py looking them up
+
+    members are written before their crc and sizes are known, so these follow the data in a data descriptor,
+    __main__.py comes last since it holds the offsets of the others
+    '''
+    import zlib
+    import struct
+    method = _manual_generator_archive_methods[encoding]
+    flags = 0x08 # data descriptor
+    skip = 0
+    if encoding == PPS_MANUAL_GENERATOR_ENCODING_LZMA:
+        flags |= 0x02 # end of stream marker
+        skip = _manual_generator_archive_lzma_header_size
+    offset = 0
+    directory = []
+    table = {}
+    for index, pieces, checksum in payloads:
+        indexes = _as_indexes(index)
+        name = str(indexes[0]).encode('ascii')
+        header = _pack_zip_local_header(name, method, flags, 0, 0, 0)
+        yield header
+        start = offset + len(header)
+        size = 0
+        for data in pieces: # checksum is complete once pieces are exhausted
+            yield data
+            size += len(data)
+        yield struct.pack(_zip_data_descriptor, b'PK\x07\x08', checksum[0], size, checksum[1])
+        directory.append(_pack_zip_central_header(name, method, flags, checksum[0], size, checksum[1], offset))
+        for i in indexes:
+            table[i] = (start + skip, size - skip)
+        offset = start + size + _zip_data_descriptor_size
+
+    main = make_manual_generator_archive_main(table, encoding).encode('utf-8')
+    name = _manual_generator_archive_main_name.encode('ascii')
+    crc = zlib.crc32(main)
+    header = _pack_zip_local_header(name, 0, 0, crc, len(main), len(main))
+    yield header + main
+    directory.append(_pack_zip_central_header(name, 0, 0, crc, len(main), len(main), offset))
+    offset += len(header) + len(main)
+    central = b''.join(directory)
+    yield central
+    yield struct.pack(_zip_end_record, b'PK\x05\x06', 0, 0, len(directory), len(directory), len(central), offset, 0)
+
+def stream_manual_generator(
+    tests : typing.Iterable[typing.Tuple[int, typing.Iterable[bytes]]],
+    encoding : str = PPS_MANUAL_GENERATOR_ENCODING_REPR,
+    layout : str = PPS_MANUAL_GENERATOR_LAYOUT_CHAIN,
+):
+    '''
+    stream one manual data generator shard piece by piece
+
+    tests are consumed lazily, so only one chunk of one test is held at a time,
+    each test is given with its index or the list of indexes sharing its data,
+    test data is raw bytes and is written back byte for byte by the generator,
+    pieces are text for chain layout and bytes of zip archive for table layout
+    '''
+    _check_manual_generator_options(encoding, layout)
+    def encoded():
+        for index, chunks in tests:
+            checksum = [0, 0]
+            yield index, encode_manual_test(chunks, encoding, layout, checksum), checksum
+    return stream_encoded_manual_generator(encoded(), encoding, layout)
+
+def stream_encoded_manual_generator(
+    payloads : typing.Iterable[typing.Tuple[int, typing.Iterable[typing.Union[str, bytes]], typing.List[int]]],
+    encoding : str = PPS_MANUAL_GENERATOR_ENCODING_REPR,
+    layout : str = PPS_MANUAL_GENERATOR_LAYOUT_CHAIN,
+):
+    '''
+    stream one manual data generator shard from test data encoded already
+
+    each payload is given with its index or the list of indexes sharing it,
+    its pieces as made by encode_manual_test and the checksum they leave once exhausted
+    '''
+    _check_manual_generator_options(encoding, layout)
+    if layout == PPS_MANUAL_GENERATOR_LAYOUT_TABLE:
+        return _stream_table_manual_generator(payloads, encoding)
+    return _stream_chain_manual_generator(payloads, encoding)
+
+def render_manual_generator(
+    tests : typing.List[typing.Tuple[typing.Union[int, typing.List[int]], typing.Union[str, bytes]]],
+    encoding : str = PPS_MANUAL_GENERATOR_ENCODING_REPR,
+    layout : str = PPS_MANUAL_GENERATOR_LAYOUT_CHAIN,
+):
+    '''
+    render one manual data generator shard, as bytes for table layout
+    '''
+    joiner = b'' if layout == PPS_MANUAL_GENERATOR_LAYOUT_TABLE else ''
+    return joiner.join(stream_manual_generator(
+        ((index, [test]) for index, test in tests),
+        encoding,
+        layout,
+    ))
+
+def group_manual_tests(
+    keys : typing.Iterable[typing.Tuple[int, typing.Hashable]],
+):
+    '''
+    group test indexes by content key, keeping order of first appearance
+    '''
+    groups = {}
+    for index, key in keys:
+        groups.setdefault(key, []).append(index)
+    return list(groups.values())
+
 def make_manual_generator(
-    tests : typing.List[typing.Tuple[int, str]],
+    tests : typing.List[typing.Tuple[int, typing.Union[str, bytes]]],
+    encoding : str = PPS_MANUAL_GENERATOR_ENCODING_REPR,
+    layout : str = PPS_MANUAL_GENERATOR_LAYOUT_CHAIN,
+    packing : str = PPS_MANUAL_GENERATOR_PACKING_ORDER,
 ):
     '''
     make manual data generator
+
+    identical tests are stored once and shared by their indexes,
+    text tests are stored as their utf-8 bytes
+
+    with zlib or lzma encoding, tests are stored compressed in base64
+    and decompressed by the generator when it runs
+
+    with table layout, the generator is a zip archive run by python as a zipapp,
+    which reads only the requested test from its own file by offset
+
+    with compact or balanced packing, tests are packed into fewer shards regardless of their order
     '''
-    prefix = '# -*- coding: utf-8 -*-\nimport sys\nt = int(sys.argv[1])\n'
-    generators = []
-    indexes = []
-    idx = []
-    generator = '# -*- coding: utf-8 -*-\nimport sys\nt = int(sys.argv[1])\n'
-    glen = len(generator)
-    for index, test in tests:
-        gtxt = f'if t == {index}:\n print({repr(test)}, end="")\n'
-        if glen + len(gtxt) > 49 * 1024 * 1024:
-            generators.append(generator)
-            indexes.append(idx)
-            idx = [index]
-            generator = prefix + gtxt
-            glen = len(generator)
-        else:
-            generator += gtxt
-            idx.append(index)
-            glen += len(gtxt)
-    if len(idx) > 0:
-        generators.append(generator)
-        indexes.append(idx)
-    
+    data = {index: _as_bytes(test) for index, test in tests}
+    groups = group_manual_tests(data.items())
+    shards = split_manual_generator(
+        [(group, measure_manual_test([data[group[0]]], encoding, layout)) for group in groups],
+        encoding,
+        layout,
+        packing,
+    )
+    generators = [
+        render_manual_generator([(group, data[group[0]]) for group in shard], encoding, layout)
+        for shard in shards
+    ]
+    indexes = [
+        [index for group in shard for index in group]
+        for shard in shards
+    ]
+
     return generators, indexes
 
 def polygon_tex_to_pps_markdown(
@@ -81,6 +865,7 @@ def polygon_tex_to_pps_markdown(
         else:
             result.append(line)
 
+    import latex2markdown # imported on first conversion, fresh or cached statements need none
     l2m = latex2markdown.LaTeX2Markdown('\n'.join(result))
 
     return l2m.to_markdown()
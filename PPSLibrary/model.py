@@ -0,0 +1,264 @@
+import json
+import typing
+import operator
+
+from json.encoder import encode_basestring
+
+from .constant import (
+    POLYGON_CONFIG_PPS_CUSTROM_MANUAL_GENERATOR,
+    PPS_CONFIG_JSON_BATCH_SIZE,
+    PPS_CONFIG_JSON_INDENT,
+    PPS_CONFIG_JSON_COMPACT_SEPARATORS,
+)
+
+class Record:
+    '''
+    record parsed from polygon config file, fields are kept in slots instead of a dict
+
+    json fields of a record are pairs of json key and attribute, for records written to pps config as they are
+    '''
+    __slots__ = ()
+    json_fields = ()
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in type(self).__slots__)
+        return f'{type(self).__name__}({fields})'
+
+class Statement(Record):
+    __slots__ = ('path', 'name', 'type', 'language')
+
+    def __init__(
+        self,
+        path : str,
+        name : str,
+        type : str,
+        language : str,
+    ):
+        self.path = path
+        self.name = name
+        self.type = type
+        self.language = language
+
+class Source(Record):
+    '''
+    source file of checker, interactor or validator
+    '''
+    __slots__ = ('path', 'name', 'type')
+
+    def __init__(
+        self,
+        path : str = '',
+        name : str = '',
+        type : str = '',
+    ):
+        self.path = path
+        self.name = name
+        self.type = type
+
+class Executable(Record):
+    '''
+    executable of package, generators are executables used by generated tests
+    '''
+    __slots__ = ('path', 'name', 'alias', 'type')
+
+    def __init__(
+        self,
+        path : str,
+        name : str,
+        alias : str,
+        type : str,
+    ):
+        self.path = path
+        self.name = name
+        self.alias = alias
+        self.type = type
+
+class Solution(Record):
+    __slots__ = ('tag', 'path', 'name', 'type')
+
+    def __init__(
+        self,
+        tag : str,
+        path : str,
+        name : str,
+        type : str,
+    ):
+        self.tag = tag
+        self.path = path
+        self.name = name
+        self.type = type
+
+class Group(Record):
+    __slots__ = ('name', 'description', 'score', 'dependencies')
+
+    def __init__(
+        self,
+        name : str,
+        description : str = '',
+        score : int = 0,
+        dependencies : typing.Optional[typing.List[str]] = None,
+    ):
+        self.name = name
+        self.description = description
+        self.score = score
+        self.dependencies = dependencies if dependencies is not None else []
+
+class Test(Record):
+    '''
+    test of package, written to pps config as its genscript entry
+
+    genscript of manual test is made from its index among manual tests and the shard of generator holding it,
+    so it is not stored for every test, strings shared by many tests are shared by parser
+    '''
+    __slots__ = (
+        'command', 'manual_index', 'shard', 'subtask_group', 'description',
+        'is_example', 'real_index', 'input_path_pattern',
+    )
+    json_fields = (
+        ('script', 'genscript'),
+        ('subtask_group', 'subtask_group'),
+        ('description', 'description'),
+        ('is_example', 'is_example'),
+        ('only_deploy', 'only_deploy'),
+    )
+    only_deploy = False
+
+    def __init__(
+        self,
+        command : typing.Optional[str],
+        manual_index : typing.Optional[int],
+        subtask_group : str,
+        description : str,
+        is_example : bool,
+        real_index : int,
+        input_path_pattern : str,
+    ):
+        self.command = command
+        self.manual_index = manual_index
+        self.shard = None
+        self.subtask_group = subtask_group
+        self.description = description
+        self.is_example = is_example
+        self.real_index = real_index
+        self.input_path_pattern = input_path_pattern
+
+    @property
+    def genscript(self):
+        if self.manual_index is None:
+            return self.command
+        if self.shard is None:
+            return f'{POLYGON_CONFIG_PPS_CUSTROM_MANUAL_GENERATOR} {self.manual_index}'
+        return f'{POLYGON_CONFIG_PPS_CUSTROM_MANUAL_GENERATOR}_{self.shard} {self.manual_index}'
+
+    def get_input_path(self):
+        '''
+        get path of input file relative to package
+        '''
+        return self.input_path_pattern % self.real_index
+
+def encode_scalar(value : typing.Any):
+    '''
+    encode json value which is not a container
+    '''
+    if value.__class__ is str:
+        return encode_basestring(value)
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    if value is None:
+        return 'null'
+    if value.__class__ is int:
+        return int.__repr__(value)
+    return json.dumps(value, ensure_ascii=False)
+
+def iter_json(
+    value : typing.Any,
+    indent : typing.Optional[int] = None,
+    separators : typing.Optional[typing.Tuple[str, str]] = None,
+):
+    '''
+    encode value as json chunk by chunk, same text as json.dumps with ensure_ascii off
+
+    records are written with their json fields, lists of records without making a dict of each
+    '''
+    if separators is None:
+        separators = (',', ': ') if indent is not None else (', ', ': ')
+    return _iter_json(value, indent, separators, 0)
+
+def iter_pps_json_config(
+    config : dict,
+    compact : bool = False,
+):
+    '''
+    encode pps config as json chunk by chunk, indented unless compact
+    '''
+    if compact:
+        return iter_json(config, separators=PPS_CONFIG_JSON_COMPACT_SEPARATORS)
+    return iter_json(config, indent=PPS_CONFIG_JSON_INDENT)
+
+def _iter_json(value, indent, separators, level):
+    item_separator, key_separator = separators
+    if isinstance(value, dict):
+        items = [(encode_basestring(key) + key_separator, item) for key, item in value.items()]
+        opening, closing = '{', '}'
+    elif isinstance(value, Record):
+        items = [(encode_basestring(key) + key_separator, getattr(value, name)) for key, name in value.json_fields]
+        opening, closing = '{', '}'
+    elif isinstance(value, (list, tuple)):
+        if len(value) > 0 and isinstance(value[0], Record):
+            yield from _iter_records(value, indent, separators, level)
+            return
+        items = [('', item) for item in value]
+        opening, closing = '[', ']'
+    else:
+        yield encode_scalar(value)
+        return
+    if len(items) == 0:
+        yield opening + closing
+        return
+
+    if indent is not None:
+        newline = '\n' + ' ' * (indent * (level + 1))
+        separator = item_separator + newline
+        closing = '\n' + ' ' * (indent * level) + closing
+    else:
+        newline = ''
+        separator = item_separator
+    yield opening + newline
+    for index, (prefix, item) in enumerate(items):
+        if index > 0:
+            yield separator
+        if prefix:
+            yield prefix
+        yield from _iter_json(item, indent, separators, level + 1)
+    yield closing
+
+def _iter_records(records, indent, separators, level):
+    '''
+    encode list of records of the same kind through one template, in batches of records
+    '''
+    item_separator, key_separator = separators
+    fields = type(records[0]).json_fields
+    if indent is not None:
+        newline = '\n' + ' ' * (indent * (level + 1))
+        field_newline = newline + ' ' * indent
+    else:
+        newline = field_newline = ''
+    template = '{' + field_newline + (item_separator + field_newline).join(
+        encode_basestring(key).replace('%', '%%') + key_separator + '%s' for key, _ in fields
+    ) + newline + '}'
+    get_values = operator.attrgetter(*(name for _, name in fields))
+    if len(fields) == 1: # attrgetter of one attribute gives the value itself
+        get_value = get_values
+        get_values = lambda record: (get_value(record),)
+    separator = item_separator + newline
+
+    yield '[' + newline
+    for start in range(0, len(records), PPS_CONFIG_JSON_BATCH_SIZE):
+        batch = separator.join(
+            template % tuple(map(encode_scalar, get_values(record)))
+            for record in records[start:start + PPS_CONFIG_JSON_BATCH_SIZE]
+        )
+        yield (separator + batch) if start > 0 else batch
+    yield ('\n' + ' ' * (indent * level) if indent is not None else '') + ']'
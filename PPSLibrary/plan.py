@@ -0,0 +1,299 @@
+import io
+import time
+import typing
+import contextlib
+
+from pathlib import Path
+
+from .constant import (
+    POLYGON_CONFIG_FILE_NAME,
+    PPS_FS_CONFIG_NAME,
+    PPS_FS_GENERATOR_PATH,
+    PPS_MANUAL_GENERATOR_SIZE_LIMIT,
+    PPS_MANUAL_GENERATOR_ENCODING_REPR,
+    PPS_MANUAL_GENERATOR_LAYOUT_CHAIN,
+    PPS_MANUAL_GENERATOR_PACKING_ORDER,
+    PPS_OUTPUT_FORMAT_DIRECTORY,
+)
+from .filesystem import FileSystem
+from .manifest import Manifest
+from .cache import get_statement_extra
+from .source import make_source
+from .sink import get_output_format
+from .misc import (
+    estimate_manual_test,
+    get_manual_test_payload_key,
+    group_manual_tests,
+    split_manual_generator,
+    get_manual_generator_layout,
+)
+from .polygon_config import PolygonConfig
+from .model import iter_pps_json_config
+
+class Planner:
+    '''
+    plan of converting polygon package, made without reading tests or writing anything
+
+    only problem.xml, the manifest of previous run and stat results of files are read,
+    payload sizes and hashes of tests are taken from the manifest when size and mtime did not change,
+    other payload sizes are bounded from file size and other tests are taken as distinct,
+    so shards are exact only if every manual test was found in the manifest
+    '''
+    def __init__(
+        self,
+        source_path : typing.Union[str, Path],
+        destination_path : typing.Union[str, Path],
+        incremental : bool = True,
+        generator_encoding : str = PPS_MANUAL_GENERATOR_ENCODING_REPR,
+        generator_layout : str = PPS_MANUAL_GENERATOR_LAYOUT_CHAIN,
+        generator_packing : str = PPS_MANUAL_GENERATOR_PACKING_ORDER,
+        output_format : typing.Optional[str] = None,
+        compact_config : bool = False,
+    ):
+        self.source_path = Path(source_path)
+        self.destination_path = Path(destination_path)
+        self.generator_encoding = generator_encoding
+        self.generator_layout = generator_layout
+        self.generator_packing = generator_packing
+        self.output_format = output_format or get_output_format(destination_path)
+        # outputs of previous run are reused only for directories, as PPSCore does
+        self.incremental = incremental and self.output_format == PPS_OUTPUT_FORMAT_DIRECTORY
+        self.compact_config = compact_config
+        self.fs = FileSystem()
+        self.manifest = Manifest(self.fs, self.destination_path)
+        self.polygon_config = PolygonConfig()
+        self.warnings = []
+
+    def make_plan(self):
+        '''
+        get plan as dictionary of operations, manual test sizes, generator shards and limits
+        '''
+        started = time.perf_counter()
+        source = make_source(self.fs, self.source_path)
+        try:
+            # parser reports what it found on stdout, which is kept for the plan itself
+            with source.open_file(self.source_path / POLYGON_CONFIG_FILE_NAME) as f, \
+                    contextlib.redirect_stdout(io.StringIO()):
+                self.polygon_config.parse_config_file(f)
+            if self.incremental:
+                self.manifest.load()
+            config, use_interactor = self.polygon_config.generate_pps_config()
+            operations = self.plan_files(source, use_interactor)
+            manual, shards = self.plan_generators(source, config)
+        finally:
+            source.close()
+
+        operations += [
+            {
+                'operation': 'generate',
+                'destination': shard['destination'],
+                'size': shard['size'],
+                'reuse': shard['reuse'],
+            } for shard in shards
+        ]
+        config_size = sum(
+            len(chunk.encode('utf-8')) for chunk in iter_pps_json_config(config, self.compact_config)
+        )
+        operations.append({
+            'operation': 'write',
+            'destination': PPS_FS_CONFIG_NAME,
+            'size': config_size,
+            'reuse': False,
+        })
+        planned = set(operation['destination'] for operation in operations)
+        operations += [
+            {'operation': 'remove', 'destination': output}
+            for output in sorted(self.manifest.previous_outputs) if output not in planned
+        ]
+
+        return {
+            'source': str(self.source_path),
+            'destination': str(self.destination_path),
+            'output_format': self.output_format,
+            'problem': {
+                'title': self.polygon_config.problem_title,
+                'type': self.polygon_config.problem_type,
+                'tests': len(self.polygon_config.tests),
+                'manual_tests': self.polygon_config.generator_custom_manual_count,
+                'time_limit': self.polygon_config.time_limit,
+                'memory_limit': self.polygon_config.memory_limit,
+            },
+            'operations': operations,
+            'manual': manual,
+            'shards': shards,
+            'exact': all(shard['exact'] for shard in shards),
+            'total_size': sum(operation.get('size') or 0 for operation in operations),
+            'exceeds_limits': any(shard['size'] > PPS_MANUAL_GENERATOR_SIZE_LIMIT for shard in shards),
+            'warnings': self.warnings,
+            'elapsed': time.perf_counter() - started,
+        }
+
+    def plan_files(
+        self,
+        source,
+        use_interactor : bool,
+    ):
+        '''
+        get copies and statement conversions, a later file with the same name wins
+        '''
+        files = {}
+        for kind, path, dest in self.polygon_config.get_pps_files(use_interactor):
+            files[dest] = (kind, path)
+
+        operations = []
+        statement_extra = None # looked up on first statement
+        for dest, (kind, path) in files.items():
+            stat = source.get_file_stat(self.source_path / path)
+            if stat is None:
+                self.warnings.append(f'Missing file: {path}')
+            # same build options as PPSCore gives to the output
+            if kind == 'statement' and statement_extra is None:
+                statement_extra = get_statement_extra()
+            extra = statement_extra if kind == 'statement' else ''
+            operations.append({
+                'operation': 'convert' if kind == 'statement' else 'copy',
+                'source': path,
+                'destination': dest,
+                'size': stat.st_size if stat is not None else None,
+                'reuse': self.is_reused(dest, [self.get_hash(self.source_path / path, stat)], extra),
+            })
+        return operations
+
+    def plan_generators(
+        self,
+        source,
+        config : dict,
+    ):
+        '''
+        get sizes of manual tests and generator shards they are packed into
+
+        genscript of manual tests and generators in config point to the planned shards
+        '''
+        manuals = self.polygon_config.generator_custom_manuals
+        data_size = 0
+        exact = 0
+        sizes = []
+        hashes = []
+        exacts = [] # whether payload size and hash of test are known
+        payload_key = get_manual_test_payload_key(self.generator_encoding, self.generator_layout)
+        for index, manual in enumerate(manuals):
+            path = self.source_path / manual.get_input_path()
+            stat = source.get_file_stat(path)
+            if stat is None:
+                self.warnings.append(f'Missing manual test: {manual.get_input_path()}')
+                sizes.append(0)
+                hashes.append(None)
+                exacts.append(False)
+                continue
+            data_size += stat.st_size
+            previous = self.get_previous_source(path, stat)
+            if previous is not None and payload_key in previous.get('payload_size', {}):
+                sizes.append(previous['payload_size'][payload_key])
+                exacts.append(True)
+                exact += 1
+            else:
+                sizes.append(estimate_manual_test(stat.st_size, self.generator_encoding, self.generator_layout))
+                exacts.append(False)
+            hashes.append(previous['hash'] if previous is not None else None)
+
+        # tests without a known hash are not deduplicated, so their payloads are counted once for every test
+        groups = group_manual_tests(
+            (index, hashes[index] if hashes[index] is not None else index)
+            for index in range(len(manuals))
+        )
+        manual = {
+            'tests': len(manuals),
+            'payloads': len(groups),
+            'data_size': data_size,
+            'payload_size': sum(sizes[group[0]] for group in groups),
+            'exact_sizes': exact,
+            'encoding': self.generator_encoding,
+        }
+        if len(groups) == 0:
+            return manual, []
+
+        group_sizes = [(group, sizes[group[0]]) for group in groups]
+        split = split_manual_generator(group_sizes, self.generator_encoding, self.generator_layout, self.generator_packing)
+        layout = get_manual_generator_layout(split, group_sizes, self.generator_encoding, self.generator_layout)
+        shards = []
+        for index, (shard, report) in enumerate(zip(split, layout)):
+            dest = f'{PPS_FS_GENERATOR_PATH}/__pps_generator_{index}.py'
+            extra = f'manual {self.generator_encoding} {self.generator_layout} ' + ' '.join(
+                ','.join(map(str, group)) for group in shard
+            )
+            shard_hashes = [hashes[group[0]] for group in shard]
+            shards.append(dict(
+                report,
+                destination = dest,
+                first_test = shard[0][0],
+                exact = all(exacts[group[0]] for group in shard),
+                reuse = self.is_reused(dest, shard_hashes, extra),
+            ))
+            if report['size'] > PPS_MANUAL_GENERATOR_SIZE_LIMIT:
+                self.warnings.append(
+                    f'{dest} {"would" if shards[-1]["exact"] else "could"} be {report["size"] / 1024 / 1024:.2f} MiB, '
+                    f'over the limit of {PPS_MANUAL_GENERATOR_SIZE_LIMIT / 1024 / 1024:.0f} MiB'
+                )
+            config['generators'].append({
+                'name': f'__pps_generator_{index}.py',
+                'language': 'py3',
+                'alias': f'__pps_generator_{index}',
+            })
+            for group in shard:
+                for i in group:
+                    manuals[i].shard = index
+        return manual, shards
+
+    def get_previous_source(
+        self,
+        source_path : Path,
+        stat,
+    ):
+        '''
+        get manifest entry of source in previous run if its size and mtime did not change
+        '''
+        previous = self.manifest.previous_sources.get(str(source_path.resolve()))
+        if previous is None or stat is None:
+            return None
+        if previous['size'] != stat.st_size or previous['mtime'] != stat.st_mtime_ns:
+            return None
+        return previous
+
+    def get_hash(
+        self,
+        source_path : Path,
+        stat,
+    ):
+        '''
+        get hash of source from previous run, None if it may have changed
+        '''
+        previous = self.get_previous_source(source_path, stat)
+        return previous['hash'] if previous is not None else None
+
+    def is_reused(
+        self,
+        dest : str,
+        hashes : typing.List[typing.Optional[str]],
+        extra : str = '',
+    ):
+        '''
+        check if output of previous run would be kept, as PPSCore checks it from the manifest
+        '''
+        if not self.incremental or None in hashes:
+            return False
+        previous = self.manifest.previous_outputs.get(dest)
+        if previous is None or previous['key'] != Manifest.make_key(hashes, extra):
+            return False
+        stat = self.fs.get_file_stat(self.destination_path / dest)
+        return stat is not None and stat.st_size == previous['size']
+
+def make_plan(
+    source_path : typing.Union[str, Path],
+    destination_path : typing.Union[str, Path],
+    **options,
+):
+    '''
+    plan conversion of polygon package without reading tests or writing anything,
+    options are the ones of PPSCore which change the package
+    '''
+    return Planner(source_path, destination_path, **options).make_plan()
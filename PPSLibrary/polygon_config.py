@@ -1,6 +1,5 @@
-import json
 import typing
-import xml.etree.ElementTree as ET
+import contextlib
 
 from pathlib import Path
 
@@ -10,6 +9,7 @@ from .error import (
 )
 from .misc import (
     compress_str,
+    compress_list,
 )
 from .mapper import (
     convert_solution_tag,
@@ -18,6 +18,27 @@ from .mapper import (
 from .filesystem import (
     FileSystem,
 )
+from .model import (
+    Statement,
+    Source,
+    Executable,
+    Solution,
+    Group,
+    Test,
+    iter_pps_json_config,
+)
+
+def parse_source(
+    attrib : dict,
+):
+    '''
+    parse source file of checker, interactor or validator from attributes of its element
+    '''
+    return Source(
+        path = attrib.get('path', ''),
+        name = FileSystem.get_filename(attrib.get('path', '')),
+        type = convert_solution_type(attrib.get('type', '')),
+    )
 
 class PolygonConfig:
     def __init__(self):
@@ -34,25 +55,27 @@ class PolygonConfig:
         self.tests = []
         self.groups = []
         self.executables = []
-        self.checker = {}
+        self.checker = Source()
         self.validators = []
-        self.interactor = {}
+        self.interactor = Source()
         self.solutions = []
         self.generators = []
     
-    def generate_pps_json_config(self):
+    def generate_pps_config(self):
         '''
-        generate pps json config
+        generate pps config as dictionary, kept in memory until the package is finished
+
+        genscript is the list of parsed tests itself, written as genscript entries when config is encoded
         '''
         config = {
             'problem_title': self.problem_title,
             'problem_type': self.problem_type,
-            'checker': self.checker['name'],
-            'checker_language': self.checker['type'],
-            'validator': self.validators[0]['name'] if len(self.validators) > 0 else '',
-            'validator_language': self.validators[0]['type'] if len(self.validators) > 0 else '',
-            'interactor': self.interactor['name'],
-            'interactor_language': self.interactor['type'],
+            'checker': self.checker.name,
+            'checker_language': self.checker.type,
+            'validator': self.validators[0].name if len(self.validators) > 0 else '',
+            'validator_language': self.validators[0].type if len(self.validators) > 0 else '',
+            'interactor': self.interactor.name,
+            'interactor_language': self.interactor.type,
             'subtask': True if len(self.groups) > 0 else False,
             'limits': {
                 'time': self.time_limit,
@@ -62,57 +85,116 @@ class PolygonConfig:
             'enable_language': [],
             'statements': [
                 {
-                    'name': statement['name'],
-                    'label': statement['language'],
+                    'name': statement.name,
+                    'label': statement.language,
                 } for statement in self.statements
             ],
             'solutions': [
                 {
-                    'name': solution['name'],
-                    'language': solution['type'],
-                    'type': solution['tag'],
+                    'name': solution.name,
+                    'language': solution.type,
+                    'type': solution.tag,
                 } for solution in self.solutions
             ],
             'generators': [
                 {
-                    'name': generator['name'],
-                    'language': generator['type'],
-                    'alias': FileSystem.remove_extension(generator['name']),
+                    'name': generator.name,
+                    'language': generator.type,
+                    'alias': FileSystem.remove_extension(generator.name),
                 } for generator in self.generators
             ],
             'subtask_group': [
                 {
-                    'name': group['name'],
-                    'description': group['description'],
-                    'score': group['score'],
-                    'dependencies': group['dependencies'],
+                    'name': group.name,
+                    'description': group.description,
+                    'score': group.score,
+                    'dependencies': group.dependencies,
                 } for group in self.groups
             ],
-            'genscript': [
-                {
-                    'script': test['genscript'],
-                    'subtask_group': test['subtask_group'],
-                    'description': test['description'],
-                    'is_example': test['is_example'],
-                    'only_deploy': False,
-                } for test in self.tests
-            ],
+            'genscript': self.tests,
             'manual_example': [],
             'versions': {
                 'config': 1,
                 'repository': 1,
             },
         }
-        return json.dumps(config, ensure_ascii=False, indent=4), self.use_interactor
+        return config, self.use_interactor
+
+    def get_pps_files(
+        self,
+        use_interactor : bool,
+    ):
+        '''
+        get files copied from polygon package into pps package, as (kind, path in polygon package, path in pps package)
+
+        statements are converted to markdown, other files are copied as they are
+        '''
+        files = [
+            ('statement', statement.path, f'{PPS_FS_STATEMENT_PATH}/{statement.name}')
+            for statement in self.statements
+        ]
+        files.append(('file', self.checker.path, f'{PPS_FS_CHECKER_PATH}/{self.checker.name}'))
+        if use_interactor:
+            files.append(('file', self.interactor.path, f'{PPS_FS_INTERACTOR_PATH}/{self.interactor.name}'))
+        files += [('file', generator.path, f'{PPS_FS_GENERATOR_PATH}/{generator.name}') for generator in self.generators]
+        files += [('file', solution.path, f'{PPS_FS_SOLUTION_PATH}/{solution.name}') for solution in self.solutions]
+        files += [('file', validator.path, f'{PPS_FS_VALIDATOR_PATH}/{validator.name}') for validator in self.validators]
+        return files
+
+    def generate_pps_json_config(
+        self,
+        compact : bool = False,
+    ):
+        '''
+        generate pps json config, without indentation and spaces if compact
+        '''
+        config, use_interactor = self.generate_pps_config()
+        return ''.join(iter_pps_json_config(config, compact)), use_interactor
 
     def parse_config_file(
         self,
-        config_file_path : typing.Union[str, Path],
+        config_file_path : typing.Union[str, Path, typing.BinaryIO],
+        streaming : bool = True,
     ):
         '''
         parse polygon config file for pps package
+
+        streaming parser reads the file in a single pass and drops elements once parsed,
+        tree parser loads the whole document first,
+        config file is given as path or binary file object
         '''
         print('Parsing polygon config file...\n')
+        if streaming:
+            self.parse_config_stream(config_file_path)
+        else:
+            self.parse_config_tree(config_file_path)
+
+        print('[PARSED] problem type:', self.problem_type)
+        print('[PARSED] problem title:', self.problem_title)
+        print('[PARSED] time limit:', self.time_limit)
+        print('[PARSED] memory limit:', self.memory_limit, '- MiB:', self.memory_limit / 1024 / 1024)
+        print('[PARSED] test count:', self.test_count)
+        print('[PARSED] generator custom manual count:', self.generator_custom_manual_count)
+        print('[PARSED] statements:', compress_list(self.statements))
+        print('[PARSED] generator custom manuals:', compress_list(self.generator_custom_manuals))
+        print('[PARSED] tests:', compress_list(self.tests))
+        print('[PARSED] groups:', compress_list(self.groups))
+        print('[PARSED] executables:', compress_list(self.executables))
+        print('[PARSED] checker:', compress_str(str(self.checker)))
+        print('[PARSED] interactor:', compress_str(str(self.interactor)))
+        print('[PARSED] validators:', compress_list(self.validators))
+        print('[PARSED] solutions:', compress_list(self.solutions))
+        print('[PARSED] generators:', compress_list(self.generators))
+        print()
+
+    def parse_config_tree(
+        self,
+        config_file_path : typing.Union[str, Path, typing.BinaryIO],
+    ):
+        '''
+        parse polygon config file from whole document tree
+        '''
+        import xml.etree.ElementTree as ET
         tree = ET.parse(config_file_path)
         root = tree.getroot()
         
@@ -189,19 +271,20 @@ class PolygonConfig:
                 attrib = statement.attrib
                 # skip not tex statement
                 if attrib.get('type', '') != POLYGON_CONFIG_STATEMENT_TEX_TYPE: continue
-                self.statements.append({
-                    'path': attrib.get('path', ''),
-                    'name': FileSystem.get_filename(attrib.get('path', '')),
-                    'type': attrib.get('type', ''),
-                    'language': attrib.get('language', ''),
-                })
-                if self.statements[-1]['name'].endswith('.tex'): # change extension to md
-                    self.statements[-1]['name'] = FileSystem.remove_extension(self.statements[-1]['name']) + '.md'
-                if self.statements[-1]['language'] in lang_map: # change language to pps language
-                    self.statements[-1]['language'] = lang_map[self.statements[-1]['language']]
+                self.statements.append(Statement(
+                    path = attrib.get('path', ''),
+                    name = FileSystem.get_filename(attrib.get('path', '')),
+                    type = attrib.get('type', ''),
+                    language = attrib.get('language', ''),
+                ))
+                if self.statements[-1].name.endswith('.tex'): # change extension to md
+                    self.statements[-1].name = FileSystem.remove_extension(self.statements[-1].name) + '.md'
+                if self.statements[-1].language in lang_map: # change language to pps language
+                    self.statements[-1].language = lang_map[self.statements[-1].language]
 
         # parse tests
         used_generator = {}
+        strings = {} # strings repeated over tests are shared
         nodes = recursive_find_all(POLYGON_CONFIG_TESTSET)
         if nodes is not None:
             for node in nodes:
@@ -211,20 +294,25 @@ class PolygonConfig:
                 node = node.find(POLYGON_CONFIG_TESTS)
                 real_index = 1
                 for test in node.findall(POLYGON_CONFIG_TEST):
-                    testObj = {}
                     method = test.attrib.get(POLYGON_CONFIG_GENERATOR_METHOD)
-                    testObj['is_example'] = bool(test.attrib.get(POLYGON_CONFIG_GENERATOR_IS_EXAMPLE, False))
-                    testObj['description'] = str(test.attrib.get(POLYGON_CONFIG_GENERATOR_DESCRIPTION, ''))
-                    testObj['subtask_group'] = str(test.attrib.get(POLYGON_CONFIG_TEST_GROUP, ''))
-                    testObj['real_index'] = real_index
-                    testObj['input_path_pattern'] = input_path_pattern
+                    description = str(test.attrib.get(POLYGON_CONFIG_GENERATOR_DESCRIPTION, ''))
+                    subtask_group = str(test.attrib.get(POLYGON_CONFIG_TEST_GROUP, ''))
+                    testObj = Test(
+                        None, # command
+                        None, # manual index
+                        strings.setdefault(subtask_group, subtask_group),
+                        strings.setdefault(description, description),
+                        bool(test.attrib.get(POLYGON_CONFIG_GENERATOR_IS_EXAMPLE, False)),
+                        real_index,
+                        input_path_pattern,
+                    )
                     if method == POLYGON_CONFIG_GENERATOR_METHOD_MANUAL: # data generated from manually
-                        testObj['genscript'] = POLYGON_CONFIG_PPS_CUSTROM_MANUAL_GENERATOR + ' ' + str(self.generator_custom_manual_count)
+                        testObj.manual_index = self.generator_custom_manual_count
                         self.generator_custom_manuals.append(testObj)
                         self.generator_custom_manual_count += 1
                     elif method == POLYGON_CONFIG_GENERATOR_METHOD_GENERATED: # data generated from generator
-                        testObj['genscript'] = test.attrib.get(POLYGON_CONFIG_GENERATOR_GENSCRIPT, '')
-                        used_generator[testObj['genscript'].split(' ')[0]] = True
+                        testObj.command = test.attrib.get(POLYGON_CONFIG_GENERATOR_GENSCRIPT, '')
+                        used_generator[testObj.command.split(' ')[0]] = True
                     else: # unknown method
                         raise PPSPolygonConfigParseError('Unknown Generator Method')
                     self.tests.append(testObj)
@@ -237,18 +325,14 @@ class PolygonConfig:
         if node is not None:
             # parse group
             for group in node.findall(POLYGON_CONFIG_GROUP):
-                groupObj = {}
-                groupObj['name'] = str(group.attrib.get('name', ''))
-                groupObj['description'] = ''
-                groupObj['score'] = 0
-                groupObj['dependencies'] = []
+                groupObj = Group(str(group.attrib.get('name', '')))
 
                 # parse dependencies
                 dependencies = group.find(POLYGON_CONFIG_DEPENDENCIES)
                 if dependencies is not None:
                     dependency = dependencies.findall(POLYGON_CONFIG_DEPENDENCY)
                     for dep in dependency:
-                        groupObj['dependencies'].append(str(dep.attrib.get('group', '')))
+                        groupObj.dependencies.append(str(dep.attrib.get('group', '')))
                 self.groups.append(groupObj)
                 
 
@@ -258,39 +342,27 @@ class PolygonConfig:
             # parse executable
             for executable in node.findall(POLYGON_CONFIG_EXECUTABLE):
                 attrib = executable.find(POLYGON_CONFIG_EXECUTABLE_SOURCE).attrib
-                execObj = {}
-                execObj['path'] = attrib.get('path', '')
-                execObj['name'] = FileSystem.get_filename(attrib.get('path', ''))
-                execObj['alias'] = FileSystem.remove_extension(execObj['name'])
-                execObj['type'] = convert_solution_type(attrib.get('type', ''))
+                name = FileSystem.get_filename(attrib.get('path', ''))
+                execObj = Executable(
+                    path = attrib.get('path', ''),
+                    name = name,
+                    alias = FileSystem.remove_extension(name),
+                    type = convert_solution_type(attrib.get('type', '')),
+                )
                 self.executables.append(execObj)
-                if execObj['alias'] in used_generator:
+                if execObj.alias in used_generator:
                     self.generators.append(execObj)
         
         # parse checker
         node = recursive_find(POLYGON_CONFIG_CHECKER)
-        attrib = node.attrib
-        self.checker = {
-            'path': attrib.get('path', ''),
-            'name': FileSystem.get_filename(attrib.get('path', '')),
-            'type': convert_solution_type(attrib.get('type', '')),
-        }
+        self.checker = parse_source(node.attrib)
 
         # parse interactor
         if self.use_interactor:
             node = recursive_find(POLYGON_CONFIG_INTERACTOR)
-            attrib = node.attrib
-            self.interactor = {
-                'path': attrib.get('path', ''),
-                'name': FileSystem.get_filename(attrib.get('path', '')),
-                'type': convert_solution_type(attrib.get('type', '')),
-            }
+            self.interactor = parse_source(node.attrib)
         else:
-            self.interactor = {
-                'path': '',
-                'name': '',
-                'type': '',
-            }
+            self.interactor = Source()
 
         # parse validators
         node = recursive_find(POLYGON_CONFIG_VALIDATORS)
@@ -298,11 +370,7 @@ class PolygonConfig:
             # parse validator
             for validator in node.findall(POLYGON_CONFIG_VALIDATOR):
                 attrib = validator.find(POLYGON_CONFIG_VALIDATOR_SOURCE).attrib
-                validObj = {}
-                validObj['path'] = attrib.get('path', '')
-                validObj['name'] = FileSystem.get_filename(attrib.get('path', ''))
-                validObj['type'] = convert_solution_type(attrib.get('type', ''))
-                self.validators.append(validObj)
+                self.validators.append(parse_source(attrib))
         
         # parse solutions
         node = recursive_find(POLYGON_CONFIG_SOLUTIONS)
@@ -310,28 +378,268 @@ class PolygonConfig:
             # parse solution
             for solution in node.findall(POLYGON_CONFIG_SOLUTION):
                 attrib = solution.find(POLYGON_CONFIG_SOLUTION_SOURCE).attrib
-                solObj = {}
-                solObj['tag'] = convert_solution_tag(solution.attrib.get('tag', ''))
-                solObj['path'] = attrib.get('path', '')
-                solObj['name'] = FileSystem.get_filename(attrib.get('path', ''))
-                solObj['type'] = convert_solution_type(attrib.get('type', ''))
-                self.solutions.append(solObj)
+                self.solutions.append(Solution(
+                    tag = convert_solution_tag(solution.attrib.get('tag', '')),
+                    path = attrib.get('path', ''),
+                    name = FileSystem.get_filename(attrib.get('path', '')),
+                    type = convert_solution_type(attrib.get('type', '')),
+                ))
 
+    def parse_config_stream(
+        self,
+        config_file_path : typing.Union[str, Path, typing.BinaryIO],
+    ):
+        '''
+        parse polygon config file in a single streaming pass
 
-        print('[PARSED] problem type:', self.problem_type)
-        print('[PARSED] problem title:', self.problem_title)
-        print('[PARSED] time limit:', self.time_limit)
-        print('[PARSED] memory limit:', self.memory_limit, '- MiB:', self.memory_limit / 1024 / 1024)
-        print('[PARSED] test count:', self.test_count)
-        print('[PARSED] generator custom manual count:', self.generator_custom_manual_count)
-        print('[PARSED] statements:', compress_str(str(self.statements)))
-        print('[PARSED] generator custom manuals:', compress_str(str(self.generator_custom_manuals)))
-        print('[PARSED] tests:', compress_str(str(self.tests)))
-        print('[PARSED] groups:', compress_str(str(self.groups)))
-        print('[PARSED] executables:', compress_str(str(self.executables)))
-        print('[PARSED] checker:', compress_str(str(self.checker)))
-        print('[PARSED] interactor:', compress_str(str(self.interactor)))
-        print('[PARSED] validators:', compress_str(str(self.validators)))
-        print('[PARSED] solutions:', compress_str(str(self.solutions)))
-        print('[PARSED] generators:', compress_str(str(self.generators)))
-        print()
\ No newline at end of file
+        expat calls back on every element as the file is read, no element tree is built
+        '''
+        target = PolygonConfigStreamTarget(self)
+        import xml.etree.ElementTree as ET
+        parser = ET.XMLParser(target=target)
+        if hasattr(config_file_path, 'read'):
+            config_file = contextlib.nullcontext(config_file_path)
+        else:
+            config_file = open(config_file_path, 'rb')
+        with config_file as f:
+            for chunk in iter(lambda: f.read(64 * 1024), b''):
+                parser.feed(chunk)
+        parser.close()
+
+class PolygonConfigStreamTarget:
+    '''
+    xml parser target filling polygon config in a single pass
+
+    every element is handled once by its path from root, when it starts if its attributes
+    are enough or when it ends if its text is needed, nothing is kept once handled
+    '''
+    lang_map = {
+        "korean": "한국어",
+        "english": "English"
+    }
+
+    def __init__(self, config : PolygonConfig):
+        def split(path : str):
+            '''
+            split xml element path into tuple of tags
+            '''
+            return tuple(path.split('.'))
+
+        self.config = config
+        self.path = () # tags from root, without root itself
+        self.depth = 0
+        self.attribs = []
+        self.text = None
+
+        self.testset_index = 0 # only the first testset gives limits and groups
+        self.testset_first_test = 0
+        self.input_path_pattern = None
+        self.real_index = 1
+        self.found = set()
+        self.used_generator = {}
+        self.strings = {} # strings repeated over tests are shared
+        self.checker = None
+        self.interactor = None
+        self.two_step = False
+        self.judging = False
+
+        testset = split(POLYGON_CONFIG_TESTSET)
+        group = split(POLYGON_CONFIG_GROUPS) + (POLYGON_CONFIG_GROUP,)
+        self.start_handlers = {
+            testset + (POLYGON_CONFIG_TESTS, POLYGON_CONFIG_TEST): self.parse_test,
+            split(POLYGON_CONFIG_PROBLEM_TITLE): self.parse_title,
+            (POLYGON_CONFIG_STATEMENTS, POLYGON_CONFIG_STATEMENT): self.parse_statement,
+            testset: self.parse_testset,
+            testset[:-1]: self.parse_judging,
+            group: self.parse_group,
+            group + (POLYGON_CONFIG_DEPENDENCIES, POLYGON_CONFIG_DEPENDENCY): self.parse_dependency,
+            split(POLYGON_CONFIG_EXECUTABLES) + (POLYGON_CONFIG_EXECUTABLE, POLYGON_CONFIG_EXECUTABLE_SOURCE): self.parse_executable,
+            split(POLYGON_CONFIG_CHECKER): self.parse_checker,
+            split(POLYGON_CONFIG_INTERACTOR): self.parse_interactor,
+            split(POLYGON_CONFIG_TWO_STEP): self.parse_two_step,
+            split(POLYGON_CONFIG_VALIDATORS) + (POLYGON_CONFIG_VALIDATOR, POLYGON_CONFIG_VALIDATOR_SOURCE): self.parse_validator,
+            split(POLYGON_CONFIG_SOLUTIONS) + (POLYGON_CONFIG_SOLUTION, POLYGON_CONFIG_SOLUTION_SOURCE): self.parse_solution,
+        }
+        self.text_handlers = {
+            split(POLYGON_CONFIG_TIME_LIMIT): self.parse_time_limit,
+            split(POLYGON_CONFIG_MEMORY_LIMIT): self.parse_memory_limit,
+            split(POLYGON_CONFIG_TEST_COUNT): self.parse_test_count,
+            testset + (POLYGON_CONFIG_INPUT_PATH_PATTERN,): self.parse_input_path_pattern,
+        }
+        self.end_handlers = {
+            testset: self.end_testset,
+        }
+
+    def start(self, tag, attrib):
+        path = self.path + (tag,) if self.depth > 0 else ()
+        self.path = path
+        self.depth += 1
+        self.attribs.append(attrib)
+        handler = self.start_handlers.get(path)
+        if handler is not None:
+            handler(attrib)
+        if path in self.text_handlers:
+            self.text = []
+
+    def data(self, data):
+        if self.text is not None:
+            self.text.append(data)
+
+    def end(self, tag):
+        if self.text is not None:
+            self.text_handlers[self.path](''.join(self.text))
+            self.text = None
+        elif self.path in self.end_handlers:
+            self.end_handlers[self.path]()
+        self.attribs.pop()
+        self.depth -= 1
+        self.path = self.path[:-1]
+
+    def close(self):
+        config = self.config
+        if not self.judging: # no tests
+            raise PPSPolygonConfigParseError('No Tests')
+
+        # parse problem type
+        if self.interactor is None: config.problem_type = POLYGON_CONFIG_PROBLEM_TYPE_STDIO
+        else:
+            if not self.two_step: config.problem_type = POLYGON_CONFIG_PROBLEM_TYPE_INTERACTIVE
+            else: config.problem_type = POLYGON_CONFIG_PROBLEM_TYPE_TWO_STEP
+            config.use_interactor = True
+
+        # generators are executables used by generated tests
+        for execObj in config.executables:
+            if execObj.alias in self.used_generator:
+                config.generators.append(execObj)
+
+        # parse checker
+        if self.checker is None:
+            raise PPSPolygonConfigParseError('No Checker')
+        config.checker = parse_source(self.checker)
+
+        # parse interactor
+        if config.use_interactor:
+            config.interactor = parse_source(self.interactor)
+        else:
+            config.interactor = Source()
+
+    def parse_title(self, attrib):
+        if 'title' not in self.found:
+            self.found.add('title')
+            self.config.problem_title = attrib.get('value', '')
+
+    def parse_statement(self, attrib):
+        # skip not tex statement
+        if attrib.get('type', '') != POLYGON_CONFIG_STATEMENT_TEX_TYPE: return
+        statement = Statement(
+            path = attrib.get('path', ''),
+            name = FileSystem.get_filename(attrib.get('path', '')),
+            type = attrib.get('type', ''),
+            language = attrib.get('language', ''),
+        )
+        if statement.name.endswith('.tex'): # change extension to md
+            statement.name = FileSystem.remove_extension(statement.name) + '.md'
+        if statement.language in self.lang_map: # change language to pps language
+            statement.language = self.lang_map[statement.language]
+        self.config.statements.append(statement)
+
+    def parse_limit(self, name : str, text : str):
+        if self.testset_index == 0 and name not in self.found:
+            self.found.add(name)
+            setattr(self.config, name, int(text))
+
+    def parse_time_limit(self, text):
+        self.parse_limit('time_limit', text)
+
+    def parse_memory_limit(self, text):
+        self.parse_limit('memory_limit', text)
+
+    def parse_test_count(self, text):
+        self.parse_limit('test_count', text)
+
+    def parse_judging(self, attrib):
+        self.judging = True
+
+    def parse_testset(self, attrib):
+        self.input_path_pattern = None
+        self.testset_first_test = len(self.config.tests)
+        self.real_index = 1
+
+    def end_testset(self):
+        self.testset_index += 1
+
+    def parse_input_path_pattern(self, text):
+        if self.input_path_pattern is not None: return
+        self.input_path_pattern = text
+        # pattern given after tests, fix tests parsed with default pattern
+        for testObj in self.config.tests[self.testset_first_test:]:
+            testObj.input_path_pattern = text
+
+    def parse_test(self, attrib):
+        config = self.config
+        method = attrib.get(POLYGON_CONFIG_GENERATOR_METHOD)
+        strings = self.strings
+        description = attrib.get(POLYGON_CONFIG_GENERATOR_DESCRIPTION, '')
+        subtask_group = attrib.get(POLYGON_CONFIG_TEST_GROUP, '')
+        # passed by position, keywords cost more than the rest of the record for every test
+        testObj = Test(
+            None, # command
+            None, # manual index
+            strings.setdefault(subtask_group, subtask_group),
+            strings.setdefault(description, description),
+            bool(attrib.get(POLYGON_CONFIG_GENERATOR_IS_EXAMPLE, False)),
+            self.real_index,
+            self.input_path_pattern or POLYGON_CONFIG_DEFAULT_INPUT_PATH_PATTERN,
+        )
+        if method == POLYGON_CONFIG_GENERATOR_METHOD_MANUAL: # data generated from manually
+            testObj.manual_index = config.generator_custom_manual_count
+            config.generator_custom_manuals.append(testObj)
+            config.generator_custom_manual_count += 1
+        elif method == POLYGON_CONFIG_GENERATOR_METHOD_GENERATED: # data generated from generator
+            genscript = attrib.get(POLYGON_CONFIG_GENERATOR_GENSCRIPT, '')
+            testObj.command = genscript
+            self.used_generator[genscript.split(' ', 1)[0]] = True
+        else: # unknown method
+            raise PPSPolygonConfigParseError('Unknown Generator Method')
+        config.tests.append(testObj)
+        self.real_index += 1
+
+    def parse_group(self, attrib):
+        if self.testset_index > 0: return
+        self.config.groups.append(Group(str(attrib.get('name', ''))))
+
+    def parse_dependency(self, attrib):
+        if self.testset_index > 0: return
+        self.config.groups[-1].dependencies.append(str(attrib.get('group', '')))
+
+    def parse_executable(self, attrib):
+        name = FileSystem.get_filename(attrib.get('path', ''))
+        self.config.executables.append(Executable(
+            path = attrib.get('path', ''),
+            name = name,
+            alias = FileSystem.remove_extension(name),
+            type = convert_solution_type(attrib.get('type', '')),
+        ))
+
+    def parse_checker(self, attrib):
+        if self.checker is None:
+            self.checker = attrib
+
+    def parse_interactor(self, attrib):
+        if self.interactor is None:
+            self.interactor = attrib
+
+    def parse_two_step(self, attrib):
+        self.two_step = True
+
+    def parse_validator(self, attrib):
+        self.config.validators.append(parse_source(attrib))
+
+    def parse_solution(self, attrib):
+        self.config.solutions.append(Solution(
+            # tag is on the parent element
+            tag = convert_solution_tag(self.attribs[-2].get('tag', '')),
+            path = attrib.get('path', ''),
+            name = FileSystem.get_filename(attrib.get('path', '')),
+            type = convert_solution_type(attrib.get('type', '')),
+        ))
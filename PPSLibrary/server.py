@@ -0,0 +1,337 @@
+import os
+import json
+import time
+import shutil
+import typing
+import tempfile
+import threading
+import urllib.parse
+
+from pathlib import Path
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .constant import (
+    PPS_MANUAL_GENERATOR_ENCODING_ZLIB,
+    PPS_MANUAL_GENERATOR_ENCODING_LZMA,
+    PPS_MANUAL_GENERATOR_LAYOUT_TABLE,
+    PPS_OUTPUT_FORMAT_DIRECTORY,
+    PPS_OUTPUT_FORMAT_ZIP,
+    PPS_OUTPUT_FORMAT_TAR,
+    PPS_OUTPUT_FORMAT_TAR_GZ,
+    PPS_SERVER_HOST,
+    PPS_SERVER_PORT,
+    PPS_SERVER_QUEUE_SIZE,
+    PPS_SERVER_CHUNK_SIZE,
+)
+from .batch import convert_package
+
+# options of PPSCore a request may override
+_request_options = {
+    'incremental': bool,
+    'generator_encoding': str,
+    'generator_layout': str,
+    'generator_packing': str,
+    'copy_strategy': str,
+    'output_format': str,
+    'use_cache': bool,
+    'compact_config': bool,
+    'verify': bool,
+}
+
+# content types of archives returned for uploaded packages
+_archive_types = {
+    PPS_OUTPUT_FORMAT_ZIP: 'application/zip',
+    PPS_OUTPUT_FORMAT_TAR: 'application/x-tar',
+    PPS_OUTPUT_FORMAT_TAR_GZ: 'application/gzip',
+}
+
+def warm_worker(
+    options : dict,
+):
+    '''
+    import pipeline, statement converter and modules needed by options of server in worker process
+    before the first request comes, a request overriding options imports the others on first use
+    '''
+    from . import core # noqa: F401
+    import latex2markdown # noqa: F401
+    import importlib.metadata # noqa: F401, converter version of statements
+
+    # payload encoding and layout of manual test generators
+    encoding = options.get('generator_encoding')
+    if encoding == PPS_MANUAL_GENERATOR_ENCODING_ZLIB:
+        import zlib, base64 # noqa: F401, E401
+    elif encoding == PPS_MANUAL_GENERATOR_ENCODING_LZMA:
+        import lzma, base64 # noqa: F401, E401
+    if options.get('generator_layout') == PPS_MANUAL_GENERATOR_LAYOUT_TABLE:
+        import zlib, struct # noqa: F401, E401
+
+    # uploaded packages are zip archives, they are refused when packages are written as directories
+    output_format = options.get('output_format')
+    if output_format != PPS_OUTPUT_FORMAT_DIRECTORY:
+        import zipfile # noqa: F401
+    if output_format in [PPS_OUTPUT_FORMAT_TAR, PPS_OUTPUT_FORMAT_TAR_GZ]:
+        import tarfile # noqa: F401
+
+def get_request_options(
+    values : dict,
+    query : bool = False,
+):
+    '''
+    get PPSCore options overridden by request, values of query string are given as text
+    '''
+    options = {}
+    for name, value in values.items():
+        if name not in _request_options:
+            raise ValueError(f'Unknown option: {name}')
+        kind = _request_options[name]
+        if query and kind is bool:
+            value = value.lower() in ['1', 'true', 'yes']
+        if not isinstance(value, kind):
+            raise ValueError(f'Option {name} has to be {kind.__name__}')
+        options[name] = value
+    return options
+
+class ConversionServer(ThreadingHTTPServer):
+    '''
+    http server converting polygon packages on a pool of warm worker processes
+
+    at most workers conversions run at once and at most queue size more wait for them,
+    requests beyond that are refused instead of piling up
+    '''
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host : str = PPS_SERVER_HOST,
+        port : int = PPS_SERVER_PORT,
+        workers : typing.Optional[int] = None,
+        queue_size : int = PPS_SERVER_QUEUE_SIZE,
+        options : typing.Optional[dict] = None,
+    ):
+        super().__init__((host, port), ConversionHandler)
+        if workers is None or workers < 1:
+            workers = os.cpu_count() or 1
+        self.workers = workers
+        self.queue_size = queue_size
+        self.options = options or {}
+        self.slots = threading.BoundedSemaphore(workers + queue_size)
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.converted = 0
+        self.failed = 0
+        self.executor = None
+        self.start_workers()
+
+    def start_workers(self):
+        '''
+        start worker processes and wait until every one of them is warm
+        '''
+        self.executor = ProcessPoolExecutor(
+            max_workers = self.workers,
+            initializer = warm_worker,
+            initargs = (self.options,),
+        )
+        # workers are started before the server threads, so none of them is forked while handling a request
+        futures = [self.executor.submit(os.getpid) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    def convert(
+        self,
+        source_path : typing.Union[str, Path],
+        destination_path : typing.Union[str, Path],
+        options : dict,
+    ):
+        '''
+        convert package on worker pool, None if queue is full
+
+        pool is started again if a worker process died
+        '''
+        if not self.slots.acquire(blocking=False):
+            return None
+        try:
+            with self.lock:
+                self.pending += 1
+                executor = self.executor
+            try:
+                result = executor.submit(
+                    convert_package, source_path, destination_path, {**self.options, **options},
+                ).result()
+            except BrokenProcessPool as e:
+                with self.lock:
+                    if self.executor is executor:
+                        executor.shutdown(wait=False)
+                        self.start_workers()
+                result = {
+                    'source': str(source_path),
+                    'destination': str(destination_path),
+                    'ok': False,
+                    'error': f'{type(e).__name__}: {e}',
+                    'traceback': '',
+                    'elapsed': 0.0,
+                    'log': '',
+                }
+            with self.lock:
+                self.pending -= 1
+                if result['ok']:
+                    self.converted += 1
+                else:
+                    self.failed += 1
+            return result
+        finally:
+            self.slots.release()
+
+    def get_status(self):
+        '''
+        get workers, queue size and counts of conversions
+        '''
+        with self.lock:
+            return {
+                'workers': self.workers,
+                'queue_size': self.queue_size,
+                'pending': self.pending,
+                'converted': self.converted,
+                'failed': self.failed,
+            }
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown()
+
+class ConversionHandler(BaseHTTPRequestHandler):
+    '''
+    handle requests of conversion server
+
+    GET /status                   state of worker pool
+    POST /convert (json)          convert package at source path into destination path, result as json
+    POST /convert (zip archive)   convert uploaded package, pps package as archive in output format of query
+    '''
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if urllib.parse.urlsplit(self.path).path != '/status':
+            return self.send_json(404, {'error': 'Not found'})
+        self.send_json(200, self.server.get_status())
+
+    def do_POST(self):
+        url = urllib.parse.urlsplit(self.path)
+        if url.path != '/convert':
+            return self.send_json(404, {'error': 'Not found'})
+        if 'Content-Length' not in self.headers:
+            return self.send_json(411, {'error': 'Content-Length is required'})
+        content_type = self.headers.get('Content-Type', '').split(';')[0].strip()
+        try:
+            if content_type == 'application/json':
+                self.convert_path()
+            else:
+                self.convert_upload(dict(urllib.parse.parse_qsl(url.query)))
+        except ValueError as e:
+            self.send_json(400, {'error': str(e)})
+
+    def convert_path(self):
+        '''
+        convert package on disk, paths are relative to working directory of server
+        '''
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        if not isinstance(request, dict) or 'source' not in request or 'destination' not in request:
+            raise ValueError('source and destination are required')
+        options = get_request_options(request.get('options', {}))
+        result = self.server.convert(request['source'], request['destination'], options)
+        if result is None:
+            return self.send_json(503, {'error': 'Queue is full'})
+        self.log_result(result)
+        self.send_json(200 if result['ok'] else 422, result)
+
+    def convert_upload(
+        self,
+        query : dict,
+    ):
+        '''
+        convert zip archive of package sent as request body, converted package is sent back as archive
+        '''
+        options = get_request_options(query, query=True)
+        output_format = options.get('output_format') or self.server.options.get('output_format') or PPS_OUTPUT_FORMAT_ZIP
+        options['output_format'] = output_format
+        if output_format == PPS_OUTPUT_FORMAT_DIRECTORY:
+            raise ValueError('Uploaded package has to be converted into an archive')
+        with tempfile.TemporaryDirectory(prefix='polygon2pps-') as directory:
+            # body is spooled to disk, workers read the archive lazily like any zipped package
+            source_path = Path(directory) / 'polygon.zip'
+            remaining = int(self.headers['Content-Length'])
+            with open(source_path, 'wb') as f:
+                while remaining > 0:
+                    chunk = self.rfile.read(min(remaining, PPS_SERVER_CHUNK_SIZE))
+                    if not chunk:
+                        raise ValueError('Request body ended early')
+                    f.write(chunk)
+                    remaining -= len(chunk)
+            destination_path = Path(directory) / f'pps.{output_format}'
+            result = self.server.convert(source_path, destination_path, options)
+            if result is None:
+                return self.send_json(503, {'error': 'Queue is full'})
+            self.log_result(result)
+            if not result['ok']:
+                return self.send_json(422, result)
+            self.send_response(200)
+            self.send_header('Content-Type', _archive_types.get(output_format, 'application/octet-stream'))
+            self.send_header('Content-Length', str(destination_path.stat().st_size))
+            self.send_header('X-PPS-Elapsed', f'{result["elapsed"]:.6f}')
+            self.end_headers()
+            with open(destination_path, 'rb') as f:
+                shutil.copyfileobj(f, self.wfile, PPS_SERVER_CHUNK_SIZE)
+
+    def send_json(
+        self,
+        status : int,
+        data : dict,
+    ):
+        '''
+        send json response
+        '''
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if status >= 400: # request body may be left unread, so connection cannot be reused
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_result(
+        self,
+        result : dict,
+    ):
+        '''
+        print result of conversion like batch mode does
+        '''
+        if result['ok']:
+            print(f'[OK] {result["source"]} ({result["elapsed"]:.2f}s)')
+        else:
+            print(f'[FAIL] {result["source"]}: {result["error"]}')
+
+    def log_message(self, format, *args):
+        print(f'[SERVE] {self.address_string()} {format % args}')
+
+def serve(
+    host : str = PPS_SERVER_HOST,
+    port : int = PPS_SERVER_PORT,
+    workers : typing.Optional[int] = None,
+    queue_size : int = PPS_SERVER_QUEUE_SIZE,
+    options : typing.Optional[dict] = None,
+):
+    '''
+    serve conversions over http until interrupted, options are defaults of every request
+    '''
+    started = time.perf_counter()
+    server = ConversionServer(host, port, workers, queue_size, options)
+    print(f'[SERVE] {server.workers} workers ready in {time.perf_counter() - started:.2f}s')
+    print(f'[SERVE] listening on http://{host}:{server.server_address[1]}, press Ctrl+C to stop')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print('[SERVE] stopped')
+    finally:
+        server.server_close()
@@ -0,0 +1,370 @@
+import abc
+import time
+import shutil
+import typing
+import threading
+
+from pathlib import Path
+
+from .constant import (
+    PPS_OUTPUT_FORMAT_DIRECTORY,
+    PPS_OUTPUT_FORMAT_ZIP,
+    PPS_OUTPUT_FORMAT_TAR,
+    PPS_OUTPUT_FORMAT_TAR_GZ,
+    PPS_OUTPUT_FORMATS,
+    PPS_OUTPUT_SPOOL_SIZE,
+)
+from .error import (
+    PPSError,
+)
+from .filesystem import (
+    FileSystem,
+)
+from .trace import (
+    traced,
+)
+
+class OutputSink(abc.ABC):
+    '''
+    destination of generated pps package
+
+    files are addressed by posix path relative to package root
+    '''
+    # outputs of previous run can be reused only when they stay on disk
+    incremental = False
+
+    @abc.abstractmethod
+    def create_directory(
+        self,
+        name : str,
+    ):
+        '''
+        create directory in package
+        '''
+        raise NotImplementedError
+
+    def write_data(
+        self,
+        name : str,
+        data : str,
+    ):
+        '''
+        write text file into package
+        '''
+        return self.write_chunks(name, [data])
+
+    def write_chunks(
+        self,
+        name : str,
+        chunks : typing.Iterable[str],
+    ):
+        '''
+        write text file into package, chunk by chunk as chunks are produced
+        '''
+        return self.write_byte_chunks(name, (chunk.encode('utf-8') for chunk in chunks))
+
+    @abc.abstractmethod
+    def write_byte_chunks(
+        self,
+        name : str,
+        chunks : typing.Iterable[bytes],
+    ):
+        '''
+        write binary file into package, chunk by chunk as chunks are produced
+        '''
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def copy_file(
+        self,
+        source_path : typing.Union[str, Path],
+        name : str,
+    ):
+        '''
+        copy file from disk into package
+        '''
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def write_file(
+        self,
+        name : str,
+        stream : typing.BinaryIO,
+        size : typing.Optional[int] = None,
+    ):
+        '''
+        write binary file object into package, size is given when known in advance
+        '''
+        raise NotImplementedError
+
+    def close(self):
+        '''
+        finish package, may be called more than once
+        '''
+
+class DirectorySink(OutputSink):
+    '''
+    write package as directory tree on disk
+    '''
+    incremental = True
+
+    def __init__(
+        self,
+        fs : FileSystem,
+        destination_path : typing.Union[str, Path],
+    ):
+        self.fs = fs
+        self.destination_path = Path(destination_path)
+
+    def create_directory(self, name):
+        self.fs.create_directory(self.destination_path / name)
+
+    def write_data(self, name, data):
+        path = self.prepare_file(name)
+        return self.fs.set_file_data(path, data)
+
+    def write_chunks(self, name, chunks):
+        path = self.prepare_file(name)
+        return self.fs.set_file_chunks(path, chunks)
+
+    def write_byte_chunks(self, name, chunks):
+        path = self.prepare_file(name)
+        return self.fs.set_file_byte_chunks(path, chunks)
+
+    def copy_file(self, source_path, name):
+        path = self.destination_path / name
+        if self.fs.is_exists(path):
+            self.fs.delete_file(path)
+        self.fs.copy_file(source_path, path)
+
+    def write_file(self, name, stream, size=None):
+        path = self.prepare_file(name)
+        return self.fs.set_file_stream(path, stream)
+
+    def prepare_file(
+        self,
+        name : str,
+    ):
+        '''
+        replace file of previous run with empty file
+        '''
+        path = self.destination_path / name
+        if self.fs.is_exists(path):
+            self.fs.delete_file(path)
+        self.fs.create_file(path)
+        return path
+
+class ZipSink(OutputSink):
+    '''
+    stream package into zip archive, given as path or writable binary file object
+
+    archive modules are imported by the sinks using them, directories need none of them
+    '''
+    def __init__(
+        self,
+        destination : typing.Union[str, Path, typing.BinaryIO],
+        compression : typing.Optional[int] = None,
+    ):
+        import zipfile
+        if compression is None:
+            compression = zipfile.ZIP_DEFLATED
+        self.archive = zipfile.ZipFile(destination, 'w', compression=compression)
+        # zip archive is written by one thread at a time
+        self.lock = threading.Lock()
+
+    @traced
+    def create_directory(self, name):
+        import zipfile
+        info = zipfile.ZipInfo(name.rstrip('/') + '/', time.localtime()[:6])
+        info.external_attr = (0o40755 << 16) | 0x10
+        with self.lock:
+            self.archive.writestr(info, b'')
+
+    @traced
+    def write_byte_chunks(self, name, chunks):
+        import zipfile
+        info = zipfile.ZipInfo(name, time.localtime()[:6])
+        info.compress_type = self.archive.compression
+        info.external_attr = 0o644 << 16
+        size = 0
+        with self.lock, self.archive.open(info, 'w') as f:
+            for chunk in chunks:
+                size += f.write(chunk)
+        return size
+
+    @traced(read_size=True)
+    def copy_file(self, source_path, name):
+        with self.lock:
+            self.archive.write(source_path, name)
+
+    @traced
+    def write_file(self, name, stream, size=None):
+        import zipfile
+        info = zipfile.ZipInfo(name, time.localtime()[:6])
+        info.compress_type = self.archive.compression
+        info.external_attr = 0o644 << 16
+        # zip64 header has to be decided before data is written
+        force_zip64 = size is None or size > zipfile.ZIP64_LIMIT
+        with self.lock, self.archive.open(info, 'w', force_zip64=force_zip64) as f:
+            shutil.copyfileobj(stream, f)
+        return info.file_size # set once the member is closed
+
+    def close(self):
+        with self.lock:
+            self.archive.close()
+
+class TarSink(OutputSink):
+    '''
+    stream package into tar archive, given as path or writable binary file object
+
+    the archive is written sequentially, so the file object does not need to be seekable
+    '''
+    def __init__(
+        self,
+        destination : typing.Union[str, Path, typing.BinaryIO],
+        compression : str = '',
+    ):
+        import tarfile
+        mode = f'w|{compression}'
+        if isinstance(destination, (str, Path)):
+            self.archive = tarfile.open(str(destination), mode)
+        else:
+            self.archive = tarfile.open(fileobj=destination, mode=mode)
+        self.lock = threading.Lock()
+
+    @traced
+    def create_directory(self, name):
+        import tarfile
+        info = self.make_info(name.rstrip('/'))
+        info.type = tarfile.DIRTYPE
+        info.mode = 0o755
+        with self.lock:
+            self.archive.addfile(info)
+
+    @traced
+    def write_byte_chunks(self, name, chunks):
+        # tar header holds the size, so chunks are spooled until the file is complete
+        import tempfile
+        with tempfile.SpooledTemporaryFile(max_size=PPS_OUTPUT_SPOOL_SIZE) as f:
+            for chunk in chunks:
+                f.write(chunk)
+            size = f.tell()
+            f.seek(0)
+            return self.add_file(name, f, size)
+
+    @traced(read_size=True)
+    def copy_file(self, source_path, name):
+        with self.lock:
+            self.archive.add(source_path, name, recursive=False)
+
+    @traced
+    def write_file(self, name, stream, size=None):
+        if size is None:
+            import tempfile
+            with tempfile.SpooledTemporaryFile(max_size=PPS_OUTPUT_SPOOL_SIZE) as f:
+                shutil.copyfileobj(stream, f)
+                size = f.tell()
+                f.seek(0)
+                return self.add_file(name, f, size)
+        return self.add_file(name, stream, size)
+
+    def add_file(
+        self,
+        name : str,
+        stream : typing.BinaryIO,
+        size : int,
+    ):
+        '''
+        add regular file of size read from binary file object to archive
+        '''
+        info = self.make_info(name)
+        info.size = size
+        with self.lock:
+            self.archive.addfile(info, stream)
+        return size
+
+    def close(self):
+        with self.lock:
+            self.archive.close()
+
+    @staticmethod
+    def make_info(
+        name : str,
+    ):
+        '''
+        make tar header of regular file
+        '''
+        import tarfile
+        info = tarfile.TarInfo(name)
+        info.mtime = int(time.time())
+        info.mode = 0o644
+        return info
+
+class MemorySink(OutputSink):
+    '''
+    keep package in memory, files are stored by name as bytes
+    '''
+    def __init__(
+        self,
+        fs : typing.Optional[FileSystem] = None,
+    ):
+        self.fs = fs if fs is not None else FileSystem()
+        self.directories = []
+        self.files = {}
+        self.lock = threading.Lock()
+
+    def create_directory(self, name):
+        with self.lock:
+            self.directories.append(name)
+
+    def write_byte_chunks(self, name, chunks):
+        data = b''.join(chunks)
+        with self.lock:
+            self.files[name] = data
+        return len(data)
+
+    def copy_file(self, source_path, name):
+        data = self.fs.get_file_bytes(source_path)
+        with self.lock:
+            self.files[name] = data
+
+    def write_file(self, name, stream, size=None):
+        data = stream.read()
+        with self.lock:
+            self.files[name] = data
+
+def get_output_format(
+    destination_path : typing.Union[str, Path],
+):
+    '''
+    guess output format from destination suffix, directory if not an archive
+    '''
+    name = Path(destination_path).name.lower()
+    if name.endswith('.tar.gz') or name.endswith('.tgz'):
+        return PPS_OUTPUT_FORMAT_TAR_GZ
+    if name.endswith('.tar'):
+        return PPS_OUTPUT_FORMAT_TAR
+    if name.endswith('.zip'):
+        return PPS_OUTPUT_FORMAT_ZIP
+    return PPS_OUTPUT_FORMAT_DIRECTORY
+
+def make_sink(
+    fs : FileSystem,
+    destination_path : typing.Union[str, Path],
+    output_format : typing.Optional[str] = None,
+):
+    '''
+    make output sink writing package to destination in output format
+    '''
+    if output_format is None:
+        output_format = get_output_format(destination_path)
+    if output_format not in PPS_OUTPUT_FORMATS:
+        raise PPSError(f'Unknown output format: {output_format}')
+    if output_format == PPS_OUTPUT_FORMAT_DIRECTORY:
+        return DirectorySink(fs, destination_path)
+    fs.create_directory(fs.get_basepath(destination_path))
+    if output_format == PPS_OUTPUT_FORMAT_ZIP:
+        return ZipSink(destination_path)
+    if output_format == PPS_OUTPUT_FORMAT_TAR_GZ:
+        return TarSink(destination_path, 'gz')
+    return TarSink(destination_path)
@@ -0,0 +1,245 @@
+import abc
+import typing
+import hashlib
+import collections
+
+from pathlib import Path, PurePosixPath
+
+from .constant import (
+    POLYGON_CONFIG_FILE_NAME,
+)
+from .error import (
+    PPSFileNotFoundError,
+)
+from .filesystem import (
+    FileSystem,
+)
+from .sink import (
+    OutputSink,
+)
+from .trace import (
+    traced,
+)
+
+# stat result of archive member, only what the manifest compares
+SourceStat = collections.namedtuple('SourceStat', ['st_size', 'st_mtime_ns'])
+
+class PackageSource(abc.ABC):
+    '''
+    polygon package to convert
+
+    files are addressed by path under source path, as if the package was a directory
+    '''
+    def __init__(
+        self,
+        source_path : typing.Union[str, Path],
+    ):
+        self.source_path = Path(source_path).resolve()
+
+    @abc.abstractmethod
+    def open_file(
+        self,
+        file_path : typing.Union[str, Path],
+    ):
+        '''
+        open file of package as binary file object
+        '''
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_file_stat(
+        self,
+        file_path : typing.Union[str, Path],
+    ):
+        '''
+        get stat result of file of package, None if file does not exist
+        '''
+        raise NotImplementedError
+
+    def get_file_data(
+        self,
+        file_path : typing.Union[str, Path],
+    ):
+        '''
+        get file data of package as text
+        '''
+        with self.open_file(file_path) as f:
+            return f.read().decode('utf-8')
+
+    def get_file_byte_chunks(
+        self,
+        file_path : typing.Union[str, Path],
+        chunk_size : int = 1024 * 1024,
+    ):
+        '''
+        get raw file data of package as iterator of chunks of at most chunk_size bytes
+        '''
+        f = self.open_file(file_path)
+        def read_chunks():
+            with f:
+                for chunk in iter(lambda: f.read(chunk_size), b''):
+                    yield chunk
+        return read_chunks()
+
+    def get_file_hash(
+        self,
+        file_path : typing.Union[str, Path],
+        chunk_size : int = 1024 * 1024,
+    ):
+        '''
+        get sha256 hex digest of file of package
+        '''
+        digest = hashlib.sha256()
+        for chunk in self.get_file_byte_chunks(file_path, chunk_size):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    def copy_file(
+        self,
+        file_path : typing.Union[str, Path],
+        sink : OutputSink,
+        name : str,
+    ):
+        '''
+        copy file of package into output sink
+        '''
+        with self.open_file(file_path) as f:
+            sink.write_file(name, f, self.get_file_stat(file_path).st_size)
+
+    def close(self):
+        '''
+        release package, may be called more than once
+        '''
+
+class DirectorySource(PackageSource):
+    '''
+    polygon package extracted to directory
+    '''
+    def __init__(
+        self,
+        fs : FileSystem,
+        source_path : typing.Union[str, Path],
+    ):
+        super().__init__(source_path)
+        self.fs = fs
+
+    def open_file(self, file_path):
+        if self.fs.get_file_stat(file_path) is None:
+            raise PPSFileNotFoundError(str(file_path))
+        return open(file_path, 'rb')
+
+    def get_file_stat(self, file_path):
+        return self.fs.get_file_stat(file_path)
+
+    def get_file_data(self, file_path):
+        return self.fs.get_file_data(file_path)
+
+    def get_file_byte_chunks(self, file_path, chunk_size=1024 * 1024):
+        return self.fs.get_file_byte_chunks(file_path, chunk_size)
+
+    def get_file_hash(self, file_path, chunk_size=1024 * 1024):
+        return self.fs.get_file_hash(file_path, chunk_size)
+
+    def copy_file(self, file_path, sink, name):
+        # sinks copy files on disk with their own fast paths
+        sink.copy_file(file_path, name)
+
+class ZipSource(PackageSource):
+    '''
+    polygon package read from its zip archive, members are read lazily without extracting
+
+    the package may be stored at the root of the archive or in its only top level directory
+    '''
+    def __init__(
+        self,
+        source_path : typing.Union[str, Path],
+    ):
+        super().__init__(source_path)
+        import zipfile # archive modules are imported only for zipped packages
+        self.archive = zipfile.ZipFile(self.source_path)
+        self.members = {info.filename: info for info in self.archive.infolist() if not info.is_dir()}
+        self.prefix = get_zip_package_prefix(self.members)
+        # members change only with the archive, so their mtime is the one of the archive
+        self.mtime = self.source_path.stat().st_mtime_ns
+
+    def get_member(
+        self,
+        file_path : typing.Union[str, Path],
+    ):
+        '''
+        get zip member of file of package, None if file does not exist
+        '''
+        try:
+            relative = Path(file_path).resolve().relative_to(self.source_path)
+        except ValueError:
+            return None
+        return self.members.get(self.prefix + PurePosixPath(relative).as_posix())
+
+    def open_file(self, file_path):
+        member = self.get_member(file_path)
+        if member is None:
+            raise PPSFileNotFoundError(str(file_path))
+        return self.archive.open(member)
+
+    # members are read through zipfile, not the file system, so they are traced here
+    @traced
+    def get_file_data(self, file_path):
+        return super().get_file_data(file_path)
+
+    @traced
+    def get_file_byte_chunks(self, file_path, chunk_size=1024 * 1024):
+        return super().get_file_byte_chunks(file_path, chunk_size)
+
+    def get_file_stat(self, file_path):
+        member = self.get_member(file_path)
+        if member is None:
+            return None
+        return SourceStat(member.file_size, self.mtime)
+
+    def close(self):
+        self.archive.close()
+
+def get_zip_package_prefix(
+    names : typing.Iterable[str],
+):
+    '''
+    get directory of polygon config file in zip archive, empty if it is at the root
+    '''
+    names = set(names)
+    if POLYGON_CONFIG_FILE_NAME in names:
+        return ''
+    prefixes = [
+        name[:-len(POLYGON_CONFIG_FILE_NAME)] for name in names
+        if name.endswith('/' + POLYGON_CONFIG_FILE_NAME) and name.count('/') == 1
+    ]
+    if len(prefixes) == 1:
+        return prefixes[0]
+    raise PPSFileNotFoundError(POLYGON_CONFIG_FILE_NAME)
+
+def is_zip_package(
+    source_path : typing.Union[str, Path],
+):
+    '''
+    check if path is a zip archive of polygon package
+    '''
+    source_path = Path(source_path)
+    import zipfile
+    if not source_path.is_file() or not zipfile.is_zipfile(source_path):
+        return False
+    with zipfile.ZipFile(source_path) as archive:
+        try:
+            get_zip_package_prefix(archive.namelist())
+        except PPSFileNotFoundError:
+            return False
+    return True
+
+def make_source(
+    fs : FileSystem,
+    source_path : typing.Union[str, Path],
+):
+    '''
+    make package source reading polygon package from directory or zip archive
+    '''
+    if Path(source_path).is_file():
+        return ZipSource(source_path)
+    return DirectorySource(fs, source_path)
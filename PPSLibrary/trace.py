@@ -0,0 +1,226 @@
+import os
+import sys
+import json
+import time
+import types
+import typing
+import functools
+import threading
+import contextlib
+
+from pathlib import Path
+
+try:
+    import resource
+except ImportError: # not available on windows
+    resource = None
+
+# tracer collecting spans, None while tracing is off
+_tracer = None
+
+def get_peak_rss():
+    '''
+    get peak resident set size of process in bytes, 0 if unknown
+    '''
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def get_size(
+    result : typing.Any,
+):
+    '''
+    get bytes moved by file operation from its result, None if unknown
+    '''
+    if isinstance(result, bool):
+        return None
+    if isinstance(result, int):
+        return result
+    if isinstance(result, (str, bytes)):
+        return len(result)
+    return None
+
+class Tracer:
+    '''
+    collect timed spans of pipeline stages and file operations as chrome trace events
+
+    the trace can be opened with chrome://tracing or https://ui.perfetto.dev
+    '''
+    def __init__(self):
+        self.events = []
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.pid = os.getpid()
+
+    def add_event(
+        self,
+        name : str,
+        category : str,
+        started : float,
+        args : dict,
+    ):
+        '''
+        add complete event started at perf counter value, ending now
+        '''
+        ended = time.perf_counter()
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': (started - self.started) * 1e6,
+            'dur': (ended - started) * 1e6,
+            'pid': self.pid,
+            'tid': threading.get_ident(),
+            'args': args,
+        }
+        with self.lock:
+            self.events.append(event)
+
+    @contextlib.contextmanager
+    def span(
+        self,
+        name : str,
+        category : str,
+        **args,
+    ):
+        '''
+        time block as span, args yielded may be filled inside the block
+        '''
+        started = time.perf_counter()
+        try:
+            yield args
+        finally:
+            args['peak_rss'] = get_peak_rss()
+            self.add_event(name, category, started, args)
+            if category == 'stage':
+                self.add_counter('memory', {'peak_rss': args['peak_rss']})
+
+    def add_counter(
+        self,
+        name : str,
+        values : dict,
+    ):
+        '''
+        add counter event, shown as graph over time
+        '''
+        event = {
+            'name': name,
+            'ph': 'C',
+            'ts': (time.perf_counter() - self.started) * 1e6,
+            'pid': self.pid,
+            'args': values,
+        }
+        with self.lock:
+            self.events.append(event)
+
+    def trace_chunks(
+        self,
+        name : str,
+        args : dict,
+        chunks : typing.Iterator,
+    ):
+        '''
+        trace lazily read chunks as one span from first to last chunk
+        '''
+        started = time.perf_counter()
+        size = 0
+        try:
+            for chunk in chunks:
+                size += len(chunk)
+                yield chunk
+        finally:
+            args['bytes'] = size
+            args['peak_rss'] = get_peak_rss()
+            self.add_event(name, 'fs', started, args)
+
+    def get_summary(self):
+        '''
+        get total time, count and bytes of spans by category and name
+        '''
+        summary = {}
+        with self.lock:
+            events = [event for event in self.events if event['ph'] == 'X']
+        for event in events:
+            entry = summary.setdefault(f'{event["cat"]}:{event["name"]}', {'count': 0, 'time_ms': 0.0, 'bytes': 0})
+            entry['count'] += 1
+            entry['time_ms'] += event['dur'] / 1000
+            entry['bytes'] += event['args'].get('bytes') or 0
+        return summary
+
+    def save(
+        self,
+        trace_path : typing.Union[str, Path],
+    ):
+        '''
+        write chrome trace json file
+        '''
+        with self.lock:
+            events = list(self.events)
+        data = {
+            'traceEvents': events,
+            'displayTimeUnit': 'ms',
+            'otherData': {
+                'peak_rss': get_peak_rss(),
+                'summary': self.get_summary(),
+            },
+        }
+        with open(trace_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+
+def start_tracing():
+    '''
+    turn tracing on, returns tracer collecting spans
+    '''
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+def stop_tracing():
+    '''
+    turn tracing off, returns tracer which collected spans
+    '''
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+def span(
+    name : str,
+    category : str,
+    **args,
+):
+    '''
+    time block as span if tracing is on
+    '''
+    tracer = _tracer
+    if tracer is None:
+        return contextlib.nullcontext(args)
+    return tracer.span(name, category, **args)
+
+def traced(
+    fn : typing.Optional[typing.Callable] = None,
+    read_size : bool = False,
+):
+    '''
+    trace calls of file system method as spans with bytes moved, only when tracing is on
+
+    bytes moved are taken from the result, or from the size of the file read if read_size is set
+    '''
+    if fn is None:
+        return functools.partial(traced, read_size=read_size)
+    @functools.wraps(fn)
+    def f(self, *args, **kwargs):
+        tracer = _tracer
+        if tracer is None:
+            return fn(self, *args, **kwargs)
+        path = str(args[0]) if len(args) > 0 else ''
+        args_ = {'path': path}
+        started = time.perf_counter()
+        result = fn(self, *args, **kwargs)
+        if isinstance(result, types.GeneratorType): # lazily read, traced while consumed
+            return tracer.trace_chunks(fn.__name__, args_, result)
+        args_['bytes'] = os.path.getsize(path) if read_size else get_size(result)
+        args_['peak_rss'] = get_peak_rss()
+        tracer.add_event(fn.__name__, 'fs', started, args_)
+        return result
+    return f
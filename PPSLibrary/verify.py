@@ -0,0 +1,103 @@
+import os
+import sys
+import time
+import typing
+import hashlib
+import tempfile
+import threading
+import subprocess
+
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from .constant import (
+    PPS_MANUAL_GENERATOR_CHUNK_SIZE,
+    PPS_MANUAL_GENERATOR_VERIFY_TIMEOUT,
+)
+
+def run_manual_generator(
+    generator_path : typing.Union[str, Path],
+    index : int,
+    timeout : float = PPS_MANUAL_GENERATOR_VERIFY_TIMEOUT,
+):
+    '''
+    run manual data generator for one test as pps does, hashing its output chunk by chunk without keeping it
+
+    stderr goes to a temporary file, so a generator writing to it cannot block on a full pipe
+    '''
+    started = time.perf_counter()
+    digest = hashlib.sha256()
+    size = 0
+    timed_out = threading.Event()
+    with tempfile.TemporaryFile() as stderr:
+        with subprocess.Popen(
+            [sys.executable, str(generator_path), str(index)],
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=stderr,
+        ) as process:
+            def kill():
+                timed_out.set()
+                process.kill()
+            timer = threading.Timer(timeout, kill)
+            timer.start()
+            try:
+                for chunk in iter(lambda: process.stdout.read(PPS_MANUAL_GENERATOR_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    size += len(chunk)
+                returncode = process.wait()
+            finally:
+                timer.cancel()
+        stderr.seek(0)
+        error = stderr.read().decode('utf-8', 'replace').strip().splitlines()
+    if timed_out.is_set():
+        error = [f'Timed out after {timeout}s']
+    return {
+        'index': index,
+        'hash': digest.hexdigest(),
+        'size': size,
+        'returncode': returncode,
+        'error': error[-1] if len(error) > 0 else '',
+        'elapsed': time.perf_counter() - started,
+    }
+
+def verify_manual_generators(
+    shards : typing.List[typing.Tuple[typing.Union[str, Path], typing.List[typing.Tuple[int, str, int]]]],
+    workers : typing.Optional[int] = None,
+    timeout : float = PPS_MANUAL_GENERATOR_VERIFY_TIMEOUT,
+):
+    '''
+    run every manual data generator shard for each of its tests and compare output with source test
+
+    shards are given as generator path and (index, sha256, size) of source tests it holds,
+    at most workers generators run at once (default: number of CPUs), threads only wait on their output,
+    report of every shard has its tests, total and slowest execution time and mismatching tests
+    '''
+    if workers is None or workers < 1:
+        workers = os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            [
+                (expected_hash, expected_size, executor.submit(run_manual_generator, generator_path, index, timeout))
+                for index, expected_hash, expected_size in tests
+            ]
+            for generator_path, tests in shards
+        ]
+
+    report = []
+    for (generator_path, tests), shard_futures in zip(shards, futures):
+        results = []
+        mismatches = []
+        for expected_hash, expected_size, future in shard_futures:
+            result = future.result()
+            results.append(result)
+            if result['returncode'] != 0 or result['hash'] != expected_hash:
+                mismatches.append(dict(result, expected_hash=expected_hash, expected_size=expected_size))
+        slowest = max(results, key=lambda result: result['elapsed'], default=None)
+        report.append({
+            'generator': Path(generator_path).name,
+            'tests': len(results),
+            'elapsed': sum(result['elapsed'] for result in results),
+            'slowest': slowest['index'] if slowest is not None else None,
+            'slowest_elapsed': slowest['elapsed'] if slowest is not None else 0.0,
+            'mismatches': mismatches,
+        })
+    return report
@@ -0,0 +1,105 @@
+import os
+import time
+import typing
+
+from pathlib import Path
+
+from .constant import (
+    POLYGON_CONFIG_FILE_NAME,
+    PPS_WATCH_INTERVAL,
+)
+from .error import (
+    PPSError,
+)
+from .misc import (
+    compress_list,
+)
+
+def take_snapshot(
+    source_path : typing.Union[str, Path],
+    exclude_path : typing.Optional[typing.Union[str, Path]] = None,
+):
+    '''
+    get size and mtime of every file under source path, only stat is used
+
+    source path may be a single file (zip archive of package)
+    '''
+    source_path = os.path.abspath(source_path)
+    exclude_path = os.path.abspath(exclude_path) if exclude_path is not None else None
+    snapshot = {}
+    if os.path.isfile(source_path):
+        stat = os.stat(source_path)
+        snapshot[source_path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+    directories = [source_path]
+    while directories:
+        with os.scandir(directories.pop()) as entries:
+            for entry in entries:
+                if entry.path == exclude_path: # destination inside source
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    directories.append(entry.path)
+                elif entry.is_file():
+                    stat = entry.stat()
+                    snapshot[entry.path] = (stat.st_size, stat.st_mtime_ns)
+    return snapshot
+
+def diff_snapshot(
+    previous : typing.Dict[str, typing.Tuple[int, int]],
+    current : typing.Dict[str, typing.Tuple[int, int]],
+):
+    '''
+    get files added, removed or modified between two snapshots
+    '''
+    return sorted(
+        path for path in previous.keys() | current.keys()
+        if previous.get(path) != current.get(path)
+    )
+
+def watch(
+    core,
+    interval : float = PPS_WATCH_INTERVAL,
+):
+    '''
+    make pps package and make it again whenever polygon package changes, until interrupted
+
+    polygon config is parsed again only when problem.xml (or zip archive) changes,
+    otherwise only outputs built from changed files are made again
+    '''
+    if not core.sink.incremental:
+        raise PPSError('Watch mode needs a directory destination')
+    source_path = Path(os.path.abspath(core.source_path))
+    config_path = str(source_path / POLYGON_CONFIG_FILE_NAME)
+    archive = source_path.is_file()
+    # changed files are shown relative to package, or archive name
+    base_path = source_path.parent if archive else source_path
+
+    snapshot = take_snapshot(source_path, core.destination_path)
+    core.run()
+    # outputs of the first run are reused from now on, even if it was forced
+    core.incremental = True
+
+    print(f'[WATCH] watching {source_path} every {interval}s, press Ctrl+C to stop')
+    reparse = False
+    try:
+        while True:
+            time.sleep(interval)
+            current = take_snapshot(source_path, core.destination_path)
+            changed = diff_snapshot(snapshot, current)
+            if len(changed) == 0:
+                continue
+            snapshot = current
+            reparse = reparse or archive or config_path in changed
+            print(f'[WATCH] changed: {compress_list(os.path.relpath(path, base_path) for path in changed)}')
+
+            started = time.perf_counter()
+            try:
+                core.update([Path(path) for path in changed], reparse)
+            except Exception as e: # keep watching, the next save may fix it
+                print(f'[WATCH] failed: {type(e).__name__}: {e}')
+                reparse = True
+                continue
+            reparse = False
+            print(f'[WATCH] updated in {time.perf_counter() - started:.2f}s')
+    except KeyboardInterrupt:
+        print('[WATCH] stopped')
@@ -0,0 +1,100 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# entry points, as python arguments, and heavy modules they must not import
+ENTRIES = {
+    'constant': (['-c', 'import PPSLibrary.constant'], [
+        'PPSLibrary.core', 'latex2markdown', 'xml.etree.ElementTree', 'concurrent.futures',
+        'zipfile', 'tarfile', 'importlib.metadata',
+    ]),
+    'run.py -h': (['run.py', '-h'], [
+        'PPSLibrary.core', 'latex2markdown', 'xml.etree.ElementTree', 'concurrent.futures',
+        'zipfile', 'tarfile', 'importlib.metadata',
+    ]),
+    'core': (['-c', 'import PPSLibrary.core'], [
+        'latex2markdown', 'xml.etree.ElementTree', 'concurrent.futures', 'zipfile', 'tarfile',
+        'tempfile', 'importlib.metadata', 'cProfile', 'inspect',
+    ]),
+}
+
+def measure_import(
+    arguments : list,
+):
+    '''
+    run python with -X importtime, get total import time in microseconds and imported modules
+    '''
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime'] + arguments,
+        cwd=ROOT_PATH, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True,
+    )
+    total = 0
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules.add(name.strip())
+        if not name[1:].startswith(' '): # top level import, its time includes nested ones
+            total += int(cumulative)
+    return total, modules
+
+def main():
+    # parse command line arguments
+    arg_parser = argparse.ArgumentParser(prog='bench_import')
+    arg_parser.add_argument('-r', '--repeat', help='Number of runs, the fastest is reported', type=int, default=10)
+    arg_parser.add_argument('--json', help='Write results to json file', default=None)
+    arg_parser.add_argument(
+        '--baseline',
+        help='Compare with results written by --json before, exit with 1 if an entry point got slower',
+        default = None,
+    )
+    arg_parser.add_argument(
+        '--tolerance',
+        help='Allowed slowdown against baseline (default: 0.3 = 30%%)',
+        type = float,
+        default = 0.3,
+    )
+    parsed_result = arg_parser.parse_args()
+
+    baseline = None
+    if parsed_result.baseline is not None:
+        with open(parsed_result.baseline, 'r', encoding='utf-8') as f:
+            baseline = {result['entry']: result for result in json.load(f)['entries']}
+
+    print(f'{"entry":>12} {"import (ms)":>12} {"modules":>8}' + (f' {"vs base":>8}' if baseline else ''))
+    results = []
+    failures = []
+    for entry, (arguments, forbidden) in ENTRIES.items():
+        best = float('inf')
+        for _ in range(parsed_result.repeat):
+            total, modules = measure_import(arguments)
+            best = min(best, total)
+        line = f'{entry:>12} {best / 1000:>12.1f} {len(modules):>8}'
+        if baseline and entry in baseline:
+            ratio = best / baseline[entry]['time'] if baseline[entry]['time'] > 0 else 1.0
+            line += f' {ratio:>7.2f}x'
+            if ratio > 1 + parsed_result.tolerance:
+                failures.append(f'{entry} got slower')
+        print(line)
+        # heavy modules have to stay lazy, checked regardless of timing noise
+        loaded = sorted(name for name in forbidden if name in modules)
+        if loaded:
+            failures.append(f'{entry} imports {", ".join(loaded)}')
+        results.append({'entry': entry, 'time': best, 'modules': len(modules)})
+
+    if parsed_result.json is not None:
+        with open(parsed_result.json, 'w', encoding='utf-8') as f:
+            json.dump({'entries': results}, f, indent=4)
+    if failures:
+        for failure in failures:
+            print(failure)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
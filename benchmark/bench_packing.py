@@ -0,0 +1,53 @@
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from PPSLibrary.constant import PPS_MANUAL_GENERATOR_PACKINGS
+from PPSLibrary.misc import split_manual_generator, get_manual_generator_layout
+
+def make_sizes(
+    count : int,
+    small_size : int,
+    large_size : int,
+    large_ratio : float,
+    rng : random.Random,
+):
+    '''
+    make encoded payload sizes of manual tests, mostly small ones mixed with some large ones
+    '''
+    return [
+        (index, rng.randint(large_size // 2, large_size) if rng.random() < large_ratio else rng.randint(1, small_size))
+        for index in range(count)
+    ]
+
+def main():
+    # parse command line arguments
+    arg_parser = argparse.ArgumentParser(prog='bench_packing')
+    arg_parser.add_argument('-n', '--tests', help='Number of manual tests', type=int, default=2000)
+    arg_parser.add_argument('--small', help='Largest size of a small test in bytes', type=int, default=2 * 1024 * 1024)
+    arg_parser.add_argument('--large', help='Largest size of a large test in bytes', type=int, default=30 * 1024 * 1024)
+    arg_parser.add_argument('--large-ratio', help='Ratio of large tests', type=float, default=0.05)
+    arg_parser.add_argument('-r', '--repeat', help='Number of runs, the fastest is reported', type=int, default=3)
+    arg_parser.add_argument('--seed', help='Seed of generated sizes', type=int, default=0)
+    parsed_result = arg_parser.parse_args()
+
+    rng = random.Random(parsed_result.seed)
+    sizes = make_sizes(parsed_result.tests, parsed_result.small, parsed_result.large, parsed_result.large_ratio, rng)
+    print(f'{len(sizes)} manual tests, {sum(size for _, size in sizes) / 1024 / 1024:.1f} MiB encoded')
+    print(f'{"packing":>10} {"shards":>7} {"min fill":>9} {"max fill":>9} {"time (ms)":>10}')
+    for packing in PPS_MANUAL_GENERATOR_PACKINGS:
+        best = float('inf')
+        for _ in range(parsed_result.repeat):
+            started = time.perf_counter()
+            shards = split_manual_generator(sizes, packing=packing)
+            best = min(best, time.perf_counter() - started)
+        fills = [shard['fill'] for shard in get_manual_generator_layout(shards, sizes)]
+        print(f'{packing:>10} {len(shards):>7} {min(fills):>8.0%} {max(fills):>8.0%} {best * 1000:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
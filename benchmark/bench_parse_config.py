@@ -0,0 +1,75 @@
+import io
+import os
+import sys
+import time
+import argparse
+import tempfile
+import contextlib
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from PPSLibrary.polygon_config import PolygonConfig
+from synthetic_package import make_config
+
+def measure(
+    config_file_path : str,
+    streaming : bool,
+    traced : bool,
+):
+    '''
+    measure parse time, or peak traced memory and memory kept by parsed config, of one parser
+
+    tracing slows allocations down, so time and memory are measured in separate runs
+    '''
+    config = PolygonConfig()
+    if traced:
+        tracemalloc.start()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        config.parse_config_file(config_file_path, streaming=streaming)
+    elapsed = time.perf_counter() - started
+    if not traced:
+        return elapsed
+    kept, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, kept
+
+def main():
+    # parse command line arguments
+    arg_parser = argparse.ArgumentParser(prog='bench_parse_config')
+    arg_parser.add_argument(
+        '-n', '--tests',
+        help='Number of tests in generated config file',
+        type = int,
+        nargs = '+',
+        default = [1000, 10000, 50000],
+    )
+    arg_parser.add_argument(
+        '-m', '--manual-ratio',
+        help='Ratio of manual tests',
+        type = float,
+        default = 0.1,
+    )
+    arg_parser.add_argument(
+        '-r', '--repeat',
+        help='Number of runs per parser, the fastest is reported',
+        type = int,
+        default = 3,
+    )
+    parsed_result = arg_parser.parse_args(sys.argv[1:])
+
+    print(f'{"tests":>8} {"parser":>8} {"time (ms)":>10} {"peak (MiB)":>11} {"kept (MiB)":>11}')
+    with tempfile.TemporaryDirectory() as directory:
+        for test_count in parsed_result.tests:
+            config_file_path = os.path.join(directory, f'problem_{test_count}.xml')
+            with open(config_file_path, 'w', encoding='utf-8') as f:
+                f.write(make_config(test_count, parsed_result.manual_ratio))
+            for name, streaming in (('tree', False), ('stream', True)):
+                elapsed = min(measure(config_file_path, streaming, False) for _ in range(parsed_result.repeat))
+                peak, kept = measure(config_file_path, streaming, True)
+                print(f'{test_count:>8} {name:>8} {elapsed * 1000:>10.1f} {peak / 1024 / 1024:>11.2f} {kept / 1024 / 1024:>11.2f}')
+
+
+if __name__ == '__main__':
+    main()
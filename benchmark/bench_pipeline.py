@@ -0,0 +1,232 @@
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from PPSLibrary import PPSCore
+from PPSLibrary.constant import (
+    POLYGON_CONFIG_FILE_NAME,
+    PPS_FS_CONFIG_NAME,
+    PPS_MANUAL_GENERATOR_ENCODINGS,
+    PPS_MANUAL_GENERATOR_ENCODING_REPR,
+    PPS_MANUAL_GENERATOR_LAYOUTS,
+    PPS_MANUAL_GENERATOR_LAYOUT_CHAIN,
+    PPS_MANUAL_GENERATOR_PACKINGS,
+    PPS_MANUAL_GENERATOR_PACKING_ORDER,
+)
+try:
+    import resource
+except ImportError: # not available on windows
+    resource = None
+
+from synthetic_package import make_package, add_package_arguments, get_package_options
+
+STAGES = ['prepare', 'generate_pps_config', 'copy_files', 'make_pps_custom_generator', 'finalize']
+
+def get_size(path):
+    '''
+    get size of file, 0 if it does not exist
+    '''
+    return os.path.getsize(path) if os.path.isfile(path) else 0
+
+def get_stage_inputs(core):
+    '''
+    get amount of work of every stage of parsed package, as (amount, unit)
+    '''
+    config = core.polygon_config
+    copied = [statement.path for statement in config.statements]
+    copied += [config.checker.path] + [item.path for item in config.generators + config.solutions + config.validators]
+    manuals = [manual.get_input_path() for manual in config.generator_custom_manuals]
+    return {
+        'prepare': (get_size(core.source_path / POLYGON_CONFIG_FILE_NAME), 'B'),
+        'generate_pps_config': (len(config.tests), 'tests'),
+        'copy_files': (sum(get_size(core.source_path / path) for path in set(copied)), 'B'),
+        'make_pps_custom_generator': (sum(get_size(core.source_path / path) for path in manuals), 'B'),
+        'finalize': (get_size(core.destination_path / PPS_FS_CONFIG_NAME), 'B'),
+    }
+
+def run_stages(
+    source_path : str,
+    destination_path : str,
+    options : dict,
+    traced : bool,
+):
+    '''
+    run every stage of pps core once from scratch, getting time or peak traced memory of each
+
+    tracing slows allocations down, so time and memory are measured in separate runs
+    '''
+    if os.path.exists(destination_path):
+        shutil.rmtree(destination_path)
+    core = PPSCore(source_path, destination_path, incremental=False, **options)
+    results = {}
+    state = {}
+    stages = {
+        'prepare': lambda: core.prepare(),
+        'generate_pps_config': lambda: state.update(use_interactor=core.generate_pps_config()),
+        'copy_files': lambda: core.copy_files(state['use_interactor']),
+        'make_pps_custom_generator': lambda: core.make_pps_custom_generator(),
+        'finalize': lambda: core.finalize(),
+    }
+    if traced:
+        tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for name in STAGES:
+                if traced:
+                    tracemalloc.reset_peak()
+                started = time.perf_counter()
+                stages[name]()
+                elapsed = time.perf_counter() - started
+                results[name] = tracemalloc.get_traced_memory()[1] if traced else elapsed
+    finally:
+        if traced:
+            tracemalloc.stop()
+        core.sink.close()
+        core.source.close()
+    return results, core
+
+def format_throughput(amount, unit, elapsed):
+    '''
+    format amount of work per second
+    '''
+    if elapsed <= 0:
+        return '-'
+    if unit == 'B':
+        return f'{amount / elapsed / 1024 / 1024:.1f} MiB/s'
+    return f'{amount / elapsed:.0f} {unit}/s'
+
+def main():
+    # parse command line arguments
+    arg_parser = argparse.ArgumentParser(prog='bench_pipeline')
+    arg_parser.add_argument(
+        '-s', '--source',
+        help='Benchmark an existing polygon package instead of a synthetic one',
+        default = None,
+    )
+    add_package_arguments(arg_parser)
+    arg_parser.add_argument(
+        '-e', '--encoding',
+        help='Payload encoding of generated manual test generators',
+        choices = PPS_MANUAL_GENERATOR_ENCODINGS,
+        default = PPS_MANUAL_GENERATOR_ENCODING_REPR,
+    )
+    arg_parser.add_argument(
+        '-l', '--layout',
+        help='Layout of generated manual test generators',
+        choices = PPS_MANUAL_GENERATOR_LAYOUTS,
+        default = PPS_MANUAL_GENERATOR_LAYOUT_CHAIN,
+    )
+    arg_parser.add_argument(
+        '--packing',
+        help='Packing of manual tests into generator shards',
+        choices = PPS_MANUAL_GENERATOR_PACKINGS,
+        default = PPS_MANUAL_GENERATOR_PACKING_ORDER,
+    )
+    arg_parser.add_argument(
+        '--compact-config',
+        help='Write config file without indentation',
+        action = 'store_true',
+    )
+    arg_parser.add_argument(
+        '--cache',
+        help='Use the statement cache, statements are converted only in the first run',
+        action = 'store_true',
+    )
+    arg_parser.add_argument(
+        '-r', '--repeat',
+        help='Number of runs, the fastest time of every stage is reported',
+        type = int,
+        default = 3,
+    )
+    arg_parser.add_argument(
+        '--json',
+        help='Write results to json file',
+        default = None,
+    )
+    arg_parser.add_argument(
+        '--baseline',
+        help='Compare with results written by --json before, exit with 1 if a stage got slower',
+        default = None,
+    )
+    arg_parser.add_argument(
+        '--tolerance',
+        help='Allowed slowdown against baseline (default: 0.2 = 20%%)',
+        type = float,
+        default = 0.2,
+    )
+    parsed_result = arg_parser.parse_args(sys.argv[1:])
+    options = {
+        'generator_encoding': parsed_result.encoding,
+        'generator_layout': parsed_result.layout,
+        'generator_packing': parsed_result.packing,
+        'use_cache': parsed_result.cache,
+        'compact_config': parsed_result.compact_config,
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        # statements cached by other runs must not be measured
+        options['cache_path'] = os.path.join(directory, 'cache')
+        source_path = parsed_result.source
+        if source_path is None:
+            source_path = os.path.join(directory, 'polygon')
+            started = time.perf_counter()
+            make_package(source_path, **get_package_options(parsed_result))
+            print(f'Synthetic package made in {time.perf_counter() - started:.2f}s')
+        destination_path = os.path.join(directory, 'pps')
+
+        times = {name: float('inf') for name in STAGES}
+        for _ in range(parsed_result.repeat):
+            elapsed, core = run_stages(source_path, destination_path, options, False)
+            for name in STAGES:
+                times[name] = min(times[name], elapsed[name])
+        inputs = get_stage_inputs(core)
+        peaks, _ = run_stages(source_path, destination_path, options, True)
+
+    baseline = None
+    if parsed_result.baseline is not None:
+        with open(parsed_result.baseline, 'r', encoding='utf-8') as f:
+            baseline = {result['stage']: result for result in json.load(f)['stages']}
+
+    print(f'{"stage":>26} {"time (ms)":>10} {"input":>12} {"throughput":>16} {"peak (MiB)":>11}' + (f' {"vs base":>8}' if baseline else ''))
+    results = []
+    regressions = []
+    for name in STAGES + ['total']:
+        if name == 'total':
+            elapsed = sum(times.values())
+            amount, unit = sum(inputs[stage][0] for stage in STAGES if inputs[stage][1] == 'B'), 'B'
+            peak = max(peaks.values())
+        else:
+            elapsed = times[name]
+            amount, unit = inputs[name]
+            peak = peaks[name]
+        amount_text = f'{amount / 1024 / 1024:.2f} MiB' if unit == 'B' else f'{amount} {unit}'
+        line = f'{name:>26} {elapsed * 1000:>10.1f} {amount_text:>12} {format_throughput(amount, unit, elapsed):>16} {peak / 1024 / 1024:>11.2f}'
+        if baseline and name in baseline:
+            ratio = elapsed / baseline[name]['time'] if baseline[name]['time'] > 0 else 1.0
+            line += f' {ratio:>7.2f}x'
+            if ratio > 1 + parsed_result.tolerance:
+                regressions.append(name)
+        print(line)
+        results.append({'stage': name, 'time': elapsed, 'input': amount, 'unit': unit, 'peak': peak})
+    if resource is not None:
+        print(f'peak rss: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB')
+
+    if parsed_result.json is not None:
+        with open(parsed_result.json, 'w', encoding='utf-8') as f:
+            json.dump({'options': vars(parsed_result), 'stages': results}, f, indent=4)
+    if regressions:
+        print(f'slower than baseline: {", ".join(regressions)}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
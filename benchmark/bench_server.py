@@ -0,0 +1,106 @@
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+import tempfile
+import threading
+import subprocess
+import http.client
+
+ROOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT_PATH)
+
+from PPSLibrary.server import ConversionServer
+
+from synthetic_package import make_package, add_package_arguments, get_package_options
+
+def convert_with_process(
+    source_path : str,
+    destination_path : str,
+    cache_path : str,
+):
+    '''
+    convert package by launching run.py, as done without server
+    '''
+    subprocess.run(
+        [sys.executable, os.path.join(ROOT_PATH, 'run.py'), '-s', source_path, '-d', destination_path, '-f', '--cache-dir', cache_path],
+        stdout=subprocess.DEVNULL, check=True,
+    )
+
+def convert_with_server(
+    port : int,
+    source_path : str,
+    destination_path : str,
+):
+    '''
+    convert package by request to running server
+    '''
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    try:
+        body = json.dumps({'source': source_path, 'destination': destination_path, 'options': {'incremental': False}})
+        connection.request('POST', '/convert', body, {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        result = json.loads(response.read())
+    finally:
+        connection.close()
+    if not result['ok']:
+        raise RuntimeError(result['error'])
+    return result['elapsed']
+
+def main():
+    # parse command line arguments
+    arg_parser = argparse.ArgumentParser(prog='bench_server')
+    arg_parser.add_argument('-r', '--repeat', help='Number of conversions of each kind', type=int, default=20)
+    arg_parser.add_argument('-j', '--jobs', help='Number of worker processes of server', type=int, default=2)
+    add_package_arguments(arg_parser)
+    arg_parser.set_defaults(tests=50, manual_size=1024, solutions=2, statements=1)
+    parsed_result = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='bench_server-') as directory:
+        source_path = os.path.join(directory, 'polygon')
+        destination_path = os.path.join(directory, 'pps')
+        cache_path = os.path.join(directory, 'cache')
+        make_package(source_path, **get_package_options(parsed_result))
+
+        # statements are cached after the first conversion in both cases
+        started = time.perf_counter()
+        server = ConversionServer(port=0, workers=parsed_result.jobs, options={'cache_path': cache_path})
+        warm = time.perf_counter() - started
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        port = server.server_address[1]
+        try:
+            # log of server is left out of the report
+            with contextlib.redirect_stdout(io.StringIO()):
+                convert_with_process(source_path, destination_path, cache_path)
+                convert_with_server(port, source_path, destination_path)
+                process_times = []
+                server_times = []
+                pipeline_times = []
+                # kinds take turns, so that both see the same load of machine
+                for _ in range(parsed_result.repeat):
+                    started = time.perf_counter()
+                    convert_with_process(source_path, destination_path, cache_path)
+                    process_times.append(time.perf_counter() - started)
+                    started = time.perf_counter()
+                    pipeline_times.append(convert_with_server(port, source_path, destination_path))
+                    server_times.append(time.perf_counter() - started)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    process_time = min(process_times)
+    server_time = min(server_times)
+    pipeline_time = min(pipeline_times)
+    print(f'server started {parsed_result.jobs} warm workers in {warm * 1000:.1f} ms')
+    print(f'{"kind":>8} {"time (ms)":>10} {"overhead (ms)":>14}')
+    print(f'{"process":>8} {process_time * 1000:>10.1f} {(process_time - pipeline_time) * 1000:>14.1f}')
+    print(f'{"server":>8} {server_time * 1000:>10.1f} {(server_time - pipeline_time) * 1000:>14.1f}')
+    print(f'pipeline itself takes {pipeline_time * 1000:.1f} ms, server is {process_time / server_time:.1f}x as fast as a new process')
+
+
+if __name__ == '__main__':
+    main()
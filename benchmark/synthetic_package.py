@@ -0,0 +1,174 @@
+import os
+import random
+import argparse
+
+_languages = ['english', 'korean', 'russian', 'japanese', 'chinese', 'french', 'german', 'spanish']
+
+_statement = '''\\begin{{problem}}{{{title}}}{{standard input}}{{standard output}}{{1 second}}{{256 megabytes}}
+
+{legend}
+
+\\InputFile
+{input}
+
+\\OutputFile
+Print the answer.
+
+\\Examples
+
+\\begin{{example}}
+\\exmp{{1 2
+}}{{3
+}}%
+\\end{{example}}
+
+\\Note
+{note}
+
+\\end{{problem}}
+'''
+
+def make_config(
+    test_count : int,
+    manual_ratio : float = 0.1,
+    solution_count : int = 1,
+    statement_count : int = 1,
+    group_count : int = 10,
+):
+    '''
+    make polygon config file content of synthetic package
+
+    the first test_count * manual_ratio tests are manual, the others are generated,
+    tests are spread over groups round robin and every group depends on the previous one
+    '''
+    tests = []
+    for index in range(test_count):
+        group = f' group="{index % group_count}"' if group_count > 0 else ''
+        if index < test_count * manual_ratio:
+            sample = ' sample="true"' if index == 0 else ''
+            tests.append(f'<test method="manual"{sample}{group}/>')
+        else:
+            tests.append(f'<test cmd="gen {index} {index * 7}" method="generated"{group}/>')
+    groups = ''.join(
+        f'<group feedback-policy="complete" name="{index}" points="{100 // group_count}" points-policy="complete-group">'
+        + (f'<dependencies><dependency group="{index - 1}"/></dependencies>' if index > 0 else '')
+        + '</group>'
+        for index in range(group_count)
+    )
+    statements = ''.join(
+        f'<statement charset="UTF-8" language="{_languages[index % len(_languages)]}" mathjax="true" '
+        f'path="statements/{_languages[index % len(_languages)]}/problem{index}.tex" type="application/x-tex"/>'
+        for index in range(statement_count)
+    )
+    solutions = ''.join(
+        f'<solution tag="{"main" if index == 0 else "accepted"}">'
+        f'<source path="solutions/sol{index}.cpp" type="cpp.g++17"/></solution>'
+        for index in range(solution_count)
+    )
+    return (
+        '<?xml version="1.0" encoding="utf-8" standalone="no"?>\n'
+        '<problem revision="1" short-name="bench">\n'
+        '<names><name language="english" value="Bench"/></names>\n'
+        f'<statements>{statements}</statements>\n'
+        '<judging><testset name="tests">\n'
+        '<time-limit>1000</time-limit><memory-limit>268435456</memory-limit>\n'
+        f'<test-count>{test_count}</test-count><input-path-pattern>tests/%02d</input-path-pattern>\n'
+        '<tests>\n' + '\n'.join(tests) + '\n</tests>\n'
+        f'<groups>{groups}</groups>\n'
+        '</testset></judging>\n'
+        '<files><executables>'
+        '<executable><source path="files/gen.cpp" type="cpp.g++17"/></executable>'
+        '<executable><source path="files/val.cpp" type="cpp.g++17"/></executable>'
+        '<executable><source path="files/check.cpp" type="cpp.g++17"/></executable>'
+        '</executables></files>\n'
+        '<assets><checker name="std::ncmp.cpp" type="testlib"><source path="files/check.cpp" type="cpp.g++17"/></checker>\n'
+        '<validators><validator><source path="files/val.cpp" type="cpp.g++17"/></validator></validators>\n'
+        f'<solutions>{solutions}</solutions>\n'
+        '</assets></problem>\n'
+    )
+
+def make_package(
+    package_path : str,
+    test_count : int,
+    manual_ratio : float = 0.1,
+    manual_size : int = 1024,
+    solution_count : int = 1,
+    statement_count : int = 1,
+    group_count : int = 10,
+    seed : int = 0,
+):
+    '''
+    write synthetic polygon package to package_path, same arguments give the same package
+
+    manual tests are lines of numbers of about manual_size bytes each,
+    cut from a random pool at random offsets so that they differ from each other
+    '''
+    rng = random.Random(seed)
+    os.makedirs(package_path, exist_ok=True)
+
+    def write(name, data):
+        path = os.path.join(package_path, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data.encode('utf-8') if isinstance(data, str) else data)
+
+    write('problem.xml', make_config(test_count, manual_ratio, solution_count, statement_count, group_count))
+    for name in ['gen.cpp', 'val.cpp', 'check.cpp']:
+        write(f'files/{name}', f'// {name}\nint main() {{ return 0; }}\n' + '// padding\n' * rng.randint(50, 500))
+    for index in range(solution_count):
+        write(f'solutions/sol{index}.cpp', f'// solution {index}\nint main() {{ return 0; }}\n' + '// padding\n' * rng.randint(50, 500))
+    for index in range(statement_count):
+        language = _languages[index % len(_languages)]
+        write(f'statements/{language}/problem{index}.tex', _statement.format(
+            title=f'Bench {index}',
+            legend='\n\n'.join(f'Paragraph {p} with $a_{{{p}}} \\le 10^9$ and \\textbf{{bold}} text.' for p in range(rng.randint(5, 30))),
+            input='The first line contains $n$ ($1 \\le n \\le 10^5$).',
+            note='No note.',
+        ))
+
+    # pool of numbers every manual test is cut from
+    pool = ' '.join(str(rng.randint(0, 10 ** 9)) for _ in range(min(max(manual_size, 64 * 1024), 1024 * 1024) // 5))
+    pool = '\n'.join(pool[start:start + 80] for start in range(0, len(pool), 80)).encode('ascii')
+    pool += pool
+    manual_count = sum(1 for index in range(test_count) if index < test_count * manual_ratio)
+    for index in range(manual_count):
+        start = rng.randrange(len(pool) // 2)
+        data = bytearray()
+        while len(data) < manual_size:
+            data += pool[start:start + manual_size - len(data)]
+            start = 0
+        write(f'tests/{index + 1:02d}', bytes(data) + b'\n')
+
+def add_package_arguments(arg_parser):
+    # command line arguments describing synthetic package
+    arg_parser.add_argument('-n', '--tests', help='Number of tests', type=int, default=1000)
+    arg_parser.add_argument('-m', '--manual-ratio', help='Ratio of manual tests', type=float, default=0.1)
+    arg_parser.add_argument('-z', '--manual-size', help='Size of a manual test in bytes', type=int, default=64 * 1024)
+    arg_parser.add_argument('--solutions', help='Number of solutions', type=int, default=5)
+    arg_parser.add_argument('--statements', help='Number of statements', type=int, default=2)
+    arg_parser.add_argument('--groups', help='Number of subtask groups', type=int, default=10)
+    arg_parser.add_argument('--seed', help='Seed of generated data', type=int, default=0)
+
+def get_package_options(parsed_result):
+    # keyword arguments of make_package from parsed command line arguments
+    return {
+        'test_count': parsed_result.tests,
+        'manual_ratio': parsed_result.manual_ratio,
+        'manual_size': parsed_result.manual_size,
+        'solution_count': parsed_result.solutions,
+        'statement_count': parsed_result.statements,
+        'group_count': parsed_result.groups,
+        'seed': parsed_result.seed,
+    }
+
+def main():
+    # parse command line arguments
+    arg_parser = argparse.ArgumentParser(prog='synthetic_package')
+    arg_parser.add_argument('path', help='Path of polygon package to create')
+    add_package_arguments(arg_parser)
+    parsed_result = arg_parser.parse_args()
+    make_package(parsed_result.path, **get_package_options(parsed_result))
+
+
+if __name__ == '__main__':
+    main()
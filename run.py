@@ -1,12 +1,198 @@
 import sys
 import argparse
 
+from PPSLibrary.constant import (
+    PPS_MANUAL_GENERATOR_ENCODINGS,
+    PPS_MANUAL_GENERATOR_ENCODING_REPR,
+    PPS_MANUAL_GENERATOR_LAYOUTS,
+    PPS_MANUAL_GENERATOR_LAYOUT_CHAIN,
+    PPS_MANUAL_GENERATOR_PACKINGS,
+    PPS_MANUAL_GENERATOR_PACKING_ORDER,
+    PPS_COPY_STRATEGIES,
+    PPS_COPY_STRATEGY_AUTO,
+    PPS_OUTPUT_FORMATS,
+    PPS_OUTPUT_FORMAT_DIRECTORY,
+    PPS_WATCH_INTERVAL,
+    PPS_SERVER_HOST,
+    PPS_SERVER_PORT,
+    PPS_SERVER_QUEUE_SIZE,
+)
+
+def add_core_arguments(arg_parser):
+    # command line arguments shared by every conversion mode
+    arg_parser.add_argument(
+        '-f', '--force',
+        help='Ignore the manifest of previous run and rebuild every file',
+        action = 'store_true',
+    )
+    arg_parser.add_argument(
+        '-e', '--encoding',
+        help='Payload encoding of generated manual test generators, zlib and lzma store tests compressed',
+        choices = PPS_MANUAL_GENERATOR_ENCODINGS,
+        default = PPS_MANUAL_GENERATOR_ENCODING_REPR,
+    )
+    arg_parser.add_argument(
+        '-l', '--layout',
+        help='Layout of generated manual test generators, table makes a zipapp reading only the requested test',
+        choices = PPS_MANUAL_GENERATOR_LAYOUTS,
+        default = PPS_MANUAL_GENERATOR_LAYOUT_CHAIN,
+    )
+    arg_parser.add_argument(
+        '-p', '--packing',
+        help='How manual tests are packed into generator shards, order keeps test order, '
+             'compact makes as few shards as it can and balanced also evens out their sizes',
+        choices = PPS_MANUAL_GENERATOR_PACKINGS,
+        default = PPS_MANUAL_GENERATOR_PACKING_ORDER,
+    )
+    arg_parser.add_argument(
+        '-c', '--copy-strategy',
+        help='How files are copied, auto uses reflink or copy_file_range when the kernel supports it, '
+             'hardlink links files on the same filesystem',
+        choices = PPS_COPY_STRATEGIES,
+        default = PPS_COPY_STRATEGY_AUTO,
+    )
+    arg_parser.add_argument(
+        '-o', '--output-format',
+        help='Write the PPS package as a directory or stream it into an archive '
+             '(default: guessed from destination suffix, .zip, .tar or .tar.gz)',
+        choices = PPS_OUTPUT_FORMATS,
+        default = None,
+    )
+    arg_parser.add_argument(
+        '--compact-config',
+        help='Write config.json without indentation, smaller and faster for problems with many tests',
+        action = 'store_true',
+    )
+    arg_parser.add_argument(
+        '--verify',
+        help='Run every generated manual test generator for each of its tests and compare the output '
+             'with the manual test, only for a directory package',
+        action = 'store_true',
+    )
+    arg_parser.add_argument(
+        '--cache-dir',
+        help='Folder of the cache of converted statements, shared by every package '
+             '(default: polygon2pps in the user cache folder)',
+        default = None,
+    )
+    arg_parser.add_argument(
+        '--no-cache',
+        help='Convert every statement again instead of using the cache of converted statements',
+        action = 'store_true',
+    )
+
+def get_core_options(parsed_result):
+    # keyword arguments of PPSCore from parsed command line arguments
+    return {
+        'incremental': not parsed_result.force,
+        'generator_encoding': parsed_result.encoding,
+        'generator_layout': parsed_result.layout,
+        'generator_packing': parsed_result.packing,
+        'copy_strategy': parsed_result.copy_strategy,
+        'output_format': parsed_result.output_format,
+        'compact_config': parsed_result.compact_config,
+        'verify': parsed_result.verify,
+        'use_cache': not parsed_result.no_cache,
+        'cache_path': parsed_result.cache_dir,
+    }
+
+def batch(argv):
+    # parse command line arguments
+    arg_parser = argparse.ArgumentParser(prog='Polygon2PPS batch')
+    arg_parser.add_argument(
+        'root',
+        help='Give the path to the folder containing polygon packages',
+    )
+    arg_parser.add_argument(
+        'destination',
+        help='Give the path to the folder where PPS packages will be created',
+    )
+    arg_parser.add_argument(
+        '-j', '--jobs',
+        help='Number of worker processes (default: number of CPUs)',
+        type = int,
+        default = None,
+    )
+    add_core_arguments(arg_parser)
+    parsed_result = arg_parser.parse_args(argv)
+
+    # convert every package in parallel
+    from PPSLibrary.batch import run_batch
+    results = run_batch(
+        root_path = parsed_result.root,
+        destination_root = parsed_result.destination,
+        workers = parsed_result.jobs,
+        options = get_core_options(parsed_result),
+    )
+    return 0 if all(result['ok'] for result in results) else 1
+
+def serve(argv):
+    # parse command line arguments
+    arg_parser = argparse.ArgumentParser(prog='Polygon2PPS serve')
+    arg_parser.add_argument(
+        '--host',
+        help=f'Address to listen on, keep it local since paths on this machine are accepted (default: {PPS_SERVER_HOST})',
+        default = PPS_SERVER_HOST,
+    )
+    arg_parser.add_argument(
+        '--port',
+        help=f'Port to listen on (default: {PPS_SERVER_PORT})',
+        type = int,
+        default = PPS_SERVER_PORT,
+    )
+    arg_parser.add_argument(
+        '-j', '--jobs',
+        help='Number of worker processes, the most conversions running at once (default: number of CPUs)',
+        type = int,
+        default = None,
+    )
+    arg_parser.add_argument(
+        '--queue',
+        help=f'Number of requests waiting for a worker before new ones are refused (default: {PPS_SERVER_QUEUE_SIZE})',
+        type = int,
+        default = PPS_SERVER_QUEUE_SIZE,
+    )
+    add_core_arguments(arg_parser)
+    parsed_result = arg_parser.parse_args(argv)
+
+    # serve conversions on warm worker processes
+    from PPSLibrary.server import serve as run_server
+    run_server(
+        host = parsed_result.host,
+        port = parsed_result.port,
+        workers = parsed_result.jobs,
+        queue_size = parsed_result.queue,
+        options = get_core_options(parsed_result),
+    )
+    return 0
+
+def plan(parsed_result):
+    # print plan of conversion, options which do not change the package are left out
+    import json
+    from PPSLibrary.plan import make_plan
+    options = get_core_options(parsed_result)
+    for name in ['copy_strategy', 'use_cache', 'cache_path', 'verify']:
+        del options[name]
+    result = make_plan(parsed_result.source, parsed_result.destination, **options)
+    data = json.dumps(result, ensure_ascii=False, indent=4)
+    if parsed_result.plan == '-':
+        print(data)
+    else:
+        with open(parsed_result.plan, 'w', encoding='utf-8') as f:
+            f.write(data + '\n')
+    return 1 if result['exceeds_limits'] else 0
+
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'batch':
+        sys.exit(batch(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        sys.exit(serve(sys.argv[2:]))
+
     # parse command line arguments
     arg_parser = argparse.ArgumentParser(prog='Polygon2PPS')
     arg_parser.add_argument(
         '-s', '--source',
-        help='Give the path to the polygon pacakage folder',
+        help='Give the path to the polygon pacakage folder or its zip archive',
         required = True,
     )
     arg_parser.add_argument(
@@ -14,16 +200,64 @@ def main():
         help='Give the path to the PPS package folder to be created',
         required = True,
     )
+    arg_parser.add_argument(
+        '-w', '--watch',
+        help='Keep running and update the PPS package whenever the polygon package changes',
+        action = 'store_true',
+    )
+    arg_parser.add_argument(
+        '--interval',
+        help='Seconds between checks for changes in watch mode',
+        type = float,
+        default = PPS_WATCH_INTERVAL,
+    )
+    arg_parser.add_argument(
+        '--plan',
+        help='Only print what would be done as JSON, to stdout or the given file, '
+             'with estimated generator shards and PPS limits, without reading tests or writing the package',
+        nargs = '?',
+        const = '-',
+        default = None,
+    )
+    arg_parser.add_argument(
+        '--trace',
+        help='Write timed spans of pipeline stages and file operations, with bytes moved and peak RSS, '
+             'to a Chrome trace JSON file (open with chrome://tracing or ui.perfetto.dev)',
+        default = None,
+    )
+    arg_parser.add_argument(
+        '--profile',
+        help='Dump cProfile stats of every pipeline stage as <stage>.prof into the given folder',
+        default = None,
+    )
+    add_core_arguments(arg_parser)
     parsed_result = arg_parser.parse_args(sys.argv[1:])
+    if parsed_result.plan is not None:
+        if parsed_result.watch:
+            arg_parser.error('plan cannot be made in watch mode')
+        sys.exit(plan(parsed_result))
+    if parsed_result.watch:
+        # checked before the archive would be created
+        from PPSLibrary.sink import get_output_format
+        output_format = parsed_result.output_format or get_output_format(parsed_result.destination)
+        if output_format != PPS_OUTPUT_FORMAT_DIRECTORY:
+            arg_parser.error('watch mode needs a directory destination')
 
     # make core object and run
     from PPSLibrary import PPSCore as Core
     core = Core(
         source_path = parsed_result.source,
         destination_path = parsed_result.destination,
+        trace_path = parsed_result.trace,
+        profile_path = parsed_result.profile,
+        **get_core_options(parsed_result),
     )
-    core.run()
+    if parsed_result.watch:
+        from PPSLibrary.watch import watch
+        watch(core, parsed_result.interval)
+    else:
+        core.run()
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()